@@ -0,0 +1,189 @@
+"""
+Lexer throughput benchmark over a seeded synthetic SQL corpus.
+
+Usage:
+    python benchmark.py                                   # default sizes and workloads
+    python benchmark.py --sizes 1KB,1MB,100MB,1GB --output results.json
+    python benchmark.py --compare baseline.json --output results.json
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+from byte_lexer import ByteLexer
+from lexer import KEYWORDS, Lexer
+from lexer_generator import SpecLexer, sql_table
+
+UNITS = {'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+BACKENDS = {
+    'lexer': lambda text, data: Lexer(text).tokenize(),
+    'lexer-lazy': lambda text, data: Lexer(text, lazy_positions=True).tokenize(),
+    'spec': lambda text, data: SpecLexer(text).tokenize(),
+    'bytes': lambda text, data: ByteLexer(data).tokenize(),
+}
+
+KEYWORD_LIST = sorted(KEYWORDS)
+LINE_ENDINGS = ['\n', '\r\n', '\r']
+
+
+def _identifier(rng, length):
+    letters = 'abcdefghijklmnopqrstuvwxyz_'
+    first = rng.choice(letters)
+    return first + ''.join(rng.choice(letters + '0123456789') for _ in range(length - 1))
+
+
+def _number(rng):
+    if rng.random() < 0.5:
+        return str(rng.randrange(10 ** rng.randint(1, 9)))
+    return f"{rng.randrange(10 ** 6)}.{rng.randrange(10 ** 4)}"
+
+
+def _statement(rng, workload):
+    # One statement of the requested flavour
+    if workload == 'strings':
+        body = ''.join(rng.choice('abcdefghij klmnopqrst,.;()') for _ in range(rng.randint(200, 2000)))
+        return f"INSERT INTO notes VALUES ('{body}', \"{body[::-1]}\");"
+    if workload == 'comments':
+        lines = [f"-- {_identifier(rng, 8)} {'=' * rng.randint(10, 120)}" for _ in range(rng.randint(5, 30))]
+        return '\n'.join(lines) + f"\nSELECT {_identifier(rng, 5)} FROM t;"
+    if workload == 'identifiers':
+        columns = ', '.join(f"{_identifier(rng, 4)}.{_identifier(rng, rng.randint(3, 20))}" for _ in range(rng.randint(5, 20)))
+        return f"SELECT {columns} FROM {_identifier(rng, 10)} WHERE {_identifier(rng, 6)} = {_identifier(rng, 6)};"
+    if workload == 'numbers':
+        values = ', '.join(_number(rng) for _ in range(rng.randint(10, 40)))
+        return f"INSERT INTO metrics VALUES ({values});"
+    # mixed: every token class, separated by varying line endings
+    parts = [
+        rng.choice(KEYWORD_LIST),
+        _identifier(rng, rng.randint(2, 12)),
+        rng.choice(['=', '!=', '<', '>', '<=', '>=', '+', '-', '*', '/']),
+        _number(rng),
+        f"'{_identifier(rng, rng.randint(1, 30))}'",
+        rng.choice([',', ';', '(', ')', '.']),
+    ]
+    rng.shuffle(parts)
+    comment = f" -- {_identifier(rng, 12)}" if rng.random() < 0.2 else ''
+    return ' '.join(parts) + comment
+
+
+def generate_corpus(workload: str, size: int, seed: int = 0) -> str:
+    # Deterministic corpus of at least `size` characters for the given seed
+    rng = random.Random(f"{workload}:{size}:{seed}")
+    pieces = []
+    total = 0
+    while total < size:
+        piece = _statement(rng, workload) + rng.choice(LINE_ENDINGS)
+        pieces.append(piece)
+        total += len(piece)
+    return ''.join(pieces)
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper()
+    for unit in ('GB', 'MB', 'KB', 'B'):
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * UNITS[unit])
+    return int(text)
+
+
+def measure(backend, text, data, repeat, with_memory):
+    run = BACKENDS[backend]
+    best = None
+    tokens = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        tokens = len(run(text, data))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = None
+    if with_memory:
+        # Separate pass: tracemalloc slows allocation down too much to time with it on
+        tracemalloc.start()
+        run(text, data)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    megabytes = len(data) / UNITS['MB']
+    return {
+        'backend': backend,
+        'seconds': best,
+        'tokens': tokens,
+        'tokens_per_sec': tokens / best if best else 0.0,
+        'mb_per_sec': megabytes / best if best else 0.0,
+        'peak_bytes': peak,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current):
+    # Print tokens/sec ratios for every (workload, size, backend) present in both runs
+    def index(report):
+        return {(r['workload'], r['size'], r['backend']): r for r in report['results']}
+
+    old, new = index(baseline), index(current)
+    print(f"\nComparison against {baseline.get('commit') or 'baseline'}")
+    print(f"  {'workload':<12} {'size':>12} {'backend':<11} {'old tok/s':>12} {'new tok/s':>12} {'ratio':>7}")
+    for key in sorted(old.keys() & new.keys()):
+        before, after = old[key]['tokens_per_sec'], new[key]['tokens_per_sec']
+        ratio = after / before if before else float('inf')
+        print(f"  {key[0]:<12} {key[1]:>12} {key[2]:<11} {before:>12,.0f} {after:>12,.0f} {ratio:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lexer throughput benchmark")
+    parser.add_argument('--sizes', default='1KB,64KB,1MB', help="comma-separated, e.g. 1KB,1MB,1GB")
+    parser.add_argument('--workloads', default='strings,comments,identifiers,numbers,mixed')
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--output', default='lexer_benchmark.json')
+    parser.add_argument('--compare', help="earlier JSON report to compare with")
+    args = parser.parse_args()
+
+    sql_table()  # compile the spec lexer outside of the timed region
+    results = []
+    print(f"  {'workload':<12} {'size':>12} {'backend':<11} {'tok/s':>12} {'MB/s':>8} {'peak MB':>8}")
+    for workload in args.workloads.split(','):
+        for size in map(parse_size, args.sizes.split(',')):
+            text = generate_corpus(workload, size, args.seed)
+            data = text.encode('utf-8')
+            for backend in args.backends.split(','):
+                result = measure(backend, text, data, args.repeat, not args.no_memory)
+                result.update(workload=workload, size=size)
+                results.append(result)
+                peak = f"{result['peak_bytes'] / UNITS['MB']:.1f}" if result['peak_bytes'] is not None else '-'
+                print(f"  {workload:<12} {size:>12} {backend:<11} "
+                      f"{result['tokens_per_sec']:>12,.0f} {result['mb_per_sec']:>8.2f} {peak:>8}")
+
+    report = {
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+from lexer import KEYWORDS, SINGLE_CHAR_TOKENS, LexerError, TokenType
+
+
+# Byte classes used by the 256-entry lookup table
+OTHER = 0
+SPACE = 1
+NEWLINE = 2
+DIGIT = 3
+IDENT = 4     # letters and '_'
+QUOTE = 5
+PUNCT = 6     # single-character tokens and comparison operators
+HIGH = 7      # first or later byte of a multi-byte UTF-8 sequence
+
+
+def _build_tables():
+    classes = bytearray(256)
+    single = [None] * 256
+    for b in range(256):
+        ch = chr(b)
+        if b >= 0x80:
+            classes[b] = HIGH
+        elif ch == '\n':
+            classes[b] = NEWLINE
+        elif ch in ' \t\r':
+            classes[b] = SPACE
+        elif ch.isdigit():
+            classes[b] = DIGIT
+        elif ch.isalpha() or ch == '_':
+            classes[b] = IDENT
+        elif ch in "'\"":
+            classes[b] = QUOTE
+        elif ch in SINGLE_CHAR_TOKENS or ch in '!<>=':
+            classes[b] = PUNCT
+    for ch, token_type in SINGLE_CHAR_TOKENS.items():
+        single[ord(ch)] = token_type
+    single[ord('<')] = TokenType.LESS
+    single[ord('>')] = TokenType.GREATER
+    single[ord('=')] = TokenType.EQUALS
+    return bytes(classes), single
+
+
+BYTE_CLASS, SINGLE_BYTE_TOKENS = _build_tables()
+
+# Two-byte operators keyed by their first byte, all of them end with '='
+DOUBLE_BYTE_TOKENS = {
+    ord('!'): TokenType.NOT_EQUALS,
+    ord('<'): TokenType.LESS_EQUAL,
+    ord('>'): TokenType.GREATER_EQUAL,
+}
+
+KEYWORD_BYTES = {name.encode('ascii'): token_type for name, token_type in KEYWORDS.items()}
+MAX_KEYWORD_LENGTH = max(len(name) for name in KEYWORD_BYTES)
+
+EQUALS_BYTE = ord('=')
+DASH_BYTE = ord('-')
+DOT_BYTE = ord('.')
+NEWLINE_BYTE = ord('\n')
+
+
+class ByteToken:
+    """
+    Token over a byte buffer: start/end are byte offsets of the lexeme (without quotes
+    for strings) and column is a 1-based byte column. The text is decoded on demand.
+    """
+
+    __slots__ = ('type', 'buffer', 'start', 'end', 'line', 'line_start')
+
+    def __init__(self, type: TokenType, buffer, start: int, end: int, line: int, line_start: int):
+        self.type = type
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self.line = line
+        self.line_start = line_start
+
+    @property
+    def value(self) -> str:
+        return str(self.buffer[self.start:self.end], 'utf-8')
+
+    @property
+    def raw(self):
+        # Zero-copy view of the lexeme bytes
+        return self.buffer[self.start:self.end]
+
+    @property
+    def column(self) -> int:
+        offset = self.start - 1 if self.type is TokenType.STRING else self.start
+        return offset - self.line_start + 1
+
+    def char_column(self) -> int:
+        # Column in characters: count the UTF-8 lead bytes between the line start and the token
+        offset = self.start - 1 if self.type is TokenType.STRING else self.start
+        return sum(1 for b in self.buffer[self.line_start:offset] if b & 0xC0 != 0x80) + 1
+
+    def __repr__(self):
+        return f"ByteToken({self.type.name}, {self.value!r}, line={self.line}, byte_col={self.column})"
+
+
+def _decode_at(buffer, pos):
+    # Decode the single UTF-8 character starting at pos, returns (char, byte length)
+    lead = buffer[pos]
+    if lead >= 0xF0:
+        size = 4
+    elif lead >= 0xE0:
+        size = 3
+    elif lead >= 0xC0:
+        size = 2
+    else:
+        size = 1
+    try:
+        return str(buffer[pos:pos + size], 'utf-8'), size
+    except UnicodeDecodeError:
+        return None, 1
+
+
+def _unexpected_at(buffer, pos):
+    # Error message for the character at pos; bytes that do not decode are shown as bytes
+    ch = _decode_at(buffer, pos)[0]
+    if ch is None:
+        return f"Invalid UTF-8 byte: {bytes(buffer[pos:pos + 1])!r}"
+    return f"Unexpected character: {ch!r}"
+
+
+class ByteLexer:
+    """
+    Lexer over UTF-8 bytes, bytearray or memoryview input that never decodes the whole
+    buffer. Bytes are classified through 256-entry tables and tokens keep byte offsets
+    into the original buffer. Non-ASCII characters are decoded one at a time and accepted
+    inside identifiers when str.isalpha()/isalnum() says so, like Lexer does.
+    """
+
+    def __init__(self, data):
+        buffer = memoryview(data)
+        if buffer.format != 'B' or buffer.ndim != 1:
+            buffer = buffer.cast('B')
+        self.buffer = buffer
+
+    def _error(self, message, line, line_start, pos):
+        return LexerError(message, line, pos - line_start + 1)
+
+    def tokenize(self):
+        buffer = self.buffer
+        n = len(buffer)
+        classes = BYTE_CLASS
+        tokens = []
+        append = tokens.append
+        pos = 0
+        line = 1
+        line_start = 0
+
+        while pos < n:
+            b = buffer[pos]
+            kind = classes[b]
+
+            if kind == SPACE:
+                pos += 1
+                continue
+
+            if kind == NEWLINE:
+                pos += 1
+                line += 1
+                line_start = pos
+                continue
+
+            if kind == IDENT or kind == HIGH:
+                start = pos
+                if kind == HIGH:
+                    ch, size = _decode_at(buffer, pos)
+                    if ch is None or not ch.isalpha():
+                        raise self._error(_unexpected_at(buffer, pos), line, line_start, pos)
+                    pos += size
+                else:
+                    pos += 1
+                while pos < n:
+                    kind = classes[buffer[pos]]
+                    if kind == IDENT or kind == DIGIT:
+                        pos += 1
+                    elif kind == HIGH:
+                        ch, size = _decode_at(buffer, pos)
+                        if ch is None or not ch.isalnum():
+                            break
+                        pos += size
+                    else:
+                        break
+                token_type = TokenType.IDENTIFIER
+                if pos - start <= MAX_KEYWORD_LENGTH:
+                    token_type = KEYWORD_BYTES.get(bytes(buffer[start:pos]).upper(), token_type)
+                append(ByteToken(token_type, buffer, start, pos, line, line_start))
+                continue
+
+            if kind == DIGIT:
+                start = pos
+                pos += 1
+                while pos < n and classes[buffer[pos]] == DIGIT:
+                    pos += 1
+                token_type = TokenType.INTEGER
+                if pos + 1 < n and buffer[pos] == DOT_BYTE and classes[buffer[pos + 1]] == DIGIT:
+                    token_type = TokenType.FLOAT
+                    pos += 2
+                    while pos < n and classes[buffer[pos]] == DIGIT:
+                        pos += 1
+                append(ByteToken(token_type, buffer, start, pos, line, line_start))
+                continue
+
+            if kind == QUOTE:
+                pos += 1
+                start = pos
+                while pos < n and buffer[pos] != b:
+                    if buffer[pos] == NEWLINE_BYTE:
+                        raise self._error("Unterminated string (newline in string)", line, line_start, pos)
+                    pos += 1
+                if pos >= n:
+                    raise self._error("Unterminated string", line, line_start, pos)
+                append(ByteToken(TokenType.STRING, buffer, start, pos, line, line_start))
+                pos += 1
+                continue
+
+            if kind == PUNCT:
+                # Comments: -- up to the end of the line
+                if b == DASH_BYTE and pos + 1 < n and buffer[pos + 1] == DASH_BYTE:
+                    while pos < n and buffer[pos] != NEWLINE_BYTE:
+                        pos += 1
+                    continue
+                if b in DOUBLE_BYTE_TOKENS and pos + 1 < n and buffer[pos + 1] == EQUALS_BYTE:
+                    append(ByteToken(DOUBLE_BYTE_TOKENS[b], buffer, pos, pos + 2, line, line_start))
+                    pos += 2
+                    continue
+                token_type = SINGLE_BYTE_TOKENS[b]
+                if token_type is not None:
+                    append(ByteToken(token_type, buffer, pos, pos + 1, line, line_start))
+                    pos += 1
+                    continue
+
+            raise self._error(_unexpected_at(buffer, pos), line, line_start, pos)
+
+        append(ByteToken(TokenType.EOF, buffer, pos, pos, line, line_start))
+        return tokens
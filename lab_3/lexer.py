@@ -1,3 +1,4 @@
+from bisect import bisect_right
 from enum import Enum, auto
 
 
@@ -69,6 +70,47 @@ class Token:
         return f"Token({self.type.name}, {self.value!r}, line={self.line}, col={self.column})"
 
 
+class LineIndex:
+    # Offsets where each line starts, built in one str.find scan the first time a position is needed
+    def __init__(self, source: str):
+        self.source = source
+        self._starts = None
+
+    def _line_starts(self):
+        if self._starts is None:
+            starts = [0]
+            find = self.source.find
+            pos = find('\n')
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = find('\n', pos + 1)
+            self._starts = starts
+        return self._starts
+
+    def position(self, offset: int):
+        # Return (line, column) of a character offset, both 1-based
+        starts = self._line_starts()
+        line = bisect_right(starts, offset)
+        return line, offset - starts[line - 1] + 1
+
+
+class LazyToken(Token):
+    # Token that only stores its start offset; line and column are resolved on access
+    def __init__(self, type: TokenType, value: str, offset: int, index: LineIndex):
+        self.type = type
+        self.value = value
+        self.offset = offset
+        self.index = index
+
+    @property
+    def line(self):
+        return self.index.position(self.offset)[0]
+
+    @property
+    def column(self):
+        return self.index.position(self.offset)[1]
+
+
 # Map keyword strings to their token types
 KEYWORDS = {t.name: t for t in TokenType if t.value <= TokenType.NULL.value}
 
@@ -93,12 +135,25 @@ class LexerError(Exception):
         self.column = column
 
 
+def _is_sync_char(ch, next_ch):
+    # Whitespace or a character tokenize() can start a token with; the digit/letter tests
+    # must match its dispatch, or recovery stops on a character it then rejects again.
+    # '!' only starts a token as the first half of '!='
+    return (ch in ' \t\r\n' or ch.isdigit() or ch.isalpha() or ch in "_'\"<>=" or ch in SINGLE_CHAR_TOKENS
+            or (ch == '!' and next_ch == '='))
+
+
 class Lexer:
-    def __init__(self, source: str):
+    def __init__(self, source: str, lazy_positions: bool = False):
+        # With lazy_positions the lexer only tracks offsets and tokens are LazyToken
         self.source = source
         self.pos = 0
         self.line = 1
         self.column = 1
+        self.lazy_positions = lazy_positions
+        self.line_index = LineIndex(source)
+        if lazy_positions:
+            self._advance = self._advance_offset
 
     def _current(self):
         # Return current character or None if at end
@@ -123,6 +178,23 @@ class Lexer:
             self.column += 1
         return ch
 
+    def _advance_offset(self):
+        # Move to the next character without line/column bookkeeping (lazy_positions mode)
+        ch = self.source[self.pos]
+        self.pos += 1
+        return ch
+
+    def _token(self, token_type, value, start, start_col):
+        if self.lazy_positions:
+            return LazyToken(token_type, value, start, self.line_index)
+        return Token(token_type, value, self.line, start_col)
+
+    def _error(self, message):
+        if self.lazy_positions:
+            line, column = self.line_index.position(self.pos)
+            return LexerError(message, line, column)
+        return LexerError(message, self.line, self.column)
+
     def _skip_whitespace(self):
         while self._current() is not None and self._current() in ' \t\r\n':
             self._advance()
@@ -135,6 +207,7 @@ class Lexer:
 
     def _read_number(self):
         # Read an integer or float literal
+        start = self.pos
         start_col = self.column
         result = ''
         is_float = False
@@ -149,27 +222,29 @@ class Lexer:
                 result += self._advance()
 
         token_type = TokenType.FLOAT if is_float else TokenType.INTEGER
-        return Token(token_type, result, self.line, start_col)
+        return self._token(token_type, result, start, start_col)
 
     def _read_string(self):
         # Read a string literal enclosed in single quotes
+        start = self.pos
         start_col = self.column
         quote_char = self._advance()  # consume opening quote
         result = ''
 
         while self._current() is not None and self._current() != quote_char:
             if self._current() == '\n':
-                raise LexerError("Unterminated string (newline in string)", self.line, self.column)
+                raise self._error("Unterminated string (newline in string)")
             result += self._advance()
 
         if self._current() is None:
-            raise LexerError("Unterminated string", self.line, self.column)
+            raise self._error("Unterminated string")
 
         self._advance()  # consume closing quote
-        return Token(TokenType.STRING, result, self.line, start_col)
+        return self._token(TokenType.STRING, result, start, start_col)
 
     def _read_identifier_or_keyword(self):
         # Read an identifier or keyword
+        start = self.pos
         start_col = self.column
         result = ''
 
@@ -178,12 +253,45 @@ class Lexer:
 
         upper = result.upper()
         if upper in KEYWORDS:
-            return Token(KEYWORDS[upper], result, self.line, start_col)
+            return self._token(KEYWORDS[upper], result, start, start_col)
+
+        return self._token(TokenType.IDENTIFIER, result, start, start_col)
 
-        return Token(TokenType.IDENTIFIER, result, self.line, start_col)
+    def _synchronize(self):
+        # Skip characters until one that can start a token or separate tokens
+        while self._current() is not None and not _is_sync_char(self._current(), self._peek()):
+            self._advance()
+
+    def _recover(self, errors, error, max_errors):
+        # Record an error in recovery mode; returns False once the cap is reached
+        errors.append(error)
+        if len(errors) >= max_errors:
+            return False
+        self._synchronize()
+        return True
 
     def tokenize(self):
         # Tokenize the entire source string and return a list of tokens
+        return self._tokenize(None, 0)
+
+    def tokenize_with_errors(self, max_errors: int = 100):
+        """
+        Recovery mode: tokenize in one pass without stopping at the first problem.
+
+        Every LexerError is recorded and scanning resumes at the next character that can
+        start a token (or whitespace). Scanning stops once max_errors errors are recorded;
+        the token list is then cut short at that point and has no trailing EOF token.
+
+        Returns:
+            Tuple of (tokens, errors)
+        """
+        if max_errors < 1:
+            raise ValueError(f"max_errors must be at least 1, got {max_errors}")
+        errors = []
+        tokens = self._tokenize(errors, max_errors)
+        return tokens, errors
+
+    def _tokenize(self, errors, max_errors):
         tokens = []
 
         while self._current() is not None:
@@ -204,7 +312,13 @@ class Lexer:
 
             # String literals
             if self._current() in ("'", '"'):
-                tokens.append(self._read_string())
+                try:
+                    tokens.append(self._read_string())
+                except LexerError as error:
+                    if errors is None:
+                        raise
+                    if not self._recover(errors, error, max_errors):
+                        return tokens
                 continue
 
             # Identifiers and keywords
@@ -213,45 +327,51 @@ class Lexer:
                 continue
 
             # Two-character operators
+            start = self.pos
             start_col = self.column
             if self._current() == '!' and self._peek() == '=':
                 self._advance()
                 self._advance()
-                tokens.append(Token(TokenType.NOT_EQUALS, '!=', self.line, start_col))
+                tokens.append(self._token(TokenType.NOT_EQUALS, '!=', start, start_col))
                 continue
             if self._current() == '<' and self._peek() == '=':
                 self._advance()
                 self._advance()
-                tokens.append(Token(TokenType.LESS_EQUAL, '<=', self.line, start_col))
+                tokens.append(self._token(TokenType.LESS_EQUAL, '<=', start, start_col))
                 continue
             if self._current() == '>' and self._peek() == '=':
                 self._advance()
                 self._advance()
-                tokens.append(Token(TokenType.GREATER_EQUAL, '>=', self.line, start_col))
+                tokens.append(self._token(TokenType.GREATER_EQUAL, '>=', start, start_col))
                 continue
 
             # Single-character operators and punctuation
             if self._current() == '<':
                 self._advance()
-                tokens.append(Token(TokenType.LESS, '<', self.line, start_col))
+                tokens.append(self._token(TokenType.LESS, '<', start, start_col))
                 continue
             if self._current() == '>':
                 self._advance()
-                tokens.append(Token(TokenType.GREATER, '>', self.line, start_col))
+                tokens.append(self._token(TokenType.GREATER, '>', start, start_col))
                 continue
             if self._current() == '=':
                 self._advance()
-                tokens.append(Token(TokenType.EQUALS, '=', self.line, start_col))
+                tokens.append(self._token(TokenType.EQUALS, '=', start, start_col))
                 continue
 
             if self._current() in SINGLE_CHAR_TOKENS:
                 ch = self._advance()
-                tokens.append(Token(SINGLE_CHAR_TOKENS[ch], ch, self.line, start_col))
+                tokens.append(self._token(SINGLE_CHAR_TOKENS[ch], ch, start, start_col))
                 continue
 
             # Unknown character
             bad = self._current()
-            raise LexerError(f"Unexpected character: {bad!r}", self.line, self.column)
-
-        tokens.append(Token(TokenType.EOF, '', self.line, self.column))
+            error = self._error(f"Unexpected character: {bad!r}")
+            if errors is None:
+                raise error
+            self._advance()  # always make progress before resynchronizing
+            if not self._recover(errors, error, max_errors):
+                return tokens
+
+        tokens.append(self._token(TokenType.EOF, '', self.pos, self.column))
         return tokens
@@ -0,0 +1,406 @@
+import os
+import sys
+
+from lexer import KEYWORDS, LexerError, Token, TokenType
+
+# Reuse the subset construction from lab 2 instead of writing a second one.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lab_2'))
+from finite_automaton import FiniteAutomaton  # noqa: E402
+
+
+# Character codes 0..127 are ASCII, everything above is folded into one symbol.
+OTHER = 128
+UNIVERSE = frozenset(range(OTHER + 1))
+
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+
+
+class SpecError(Exception):
+    pass
+
+
+def keyword(word: str) -> str:
+    # Case-insensitive pattern for a keyword: SELECT -> [Ss][Ee][Ll]...
+    return ''.join(f"[{ch.upper()}{ch.lower()}]" if ch.isalpha() else '\\' + ch for ch in word)
+
+
+def _trim_quotes(text: str) -> str:
+    return text[1:-1]
+
+
+# Declarative token spec for the SQL lexer: (TokenType or None to skip, pattern[, value converter]).
+# Earlier rules win when two rules match the same longest lexeme.
+SQL_SPEC = [
+    (None, r"[ \t\r\n]+"),
+    (None, r"--[^\n]*"),
+    *[(token_type, keyword(name)) for name, token_type in KEYWORDS.items()],
+    (TokenType.FLOAT, r"[0-9]+\.[0-9]+"),
+    (TokenType.INTEGER, r"[0-9]+"),
+    (TokenType.STRING, r"'[^'\n]*'|" + r'"[^"\n]*"', _trim_quotes),
+    (TokenType.IDENTIFIER, r"[A-Za-z_][A-Za-z0-9_]*"),
+    (TokenType.NOT_EQUALS, r"!="),
+    (TokenType.LESS_EQUAL, r"<="),
+    (TokenType.GREATER_EQUAL, r">="),
+    (TokenType.LESS, r"<"),
+    (TokenType.GREATER, r">"),
+    (TokenType.EQUALS, r"="),
+    (TokenType.PLUS, r"\+"),
+    (TokenType.MINUS, r"\-"),
+    (TokenType.STAR, r"\*"),
+    (TokenType.SLASH, r"/"),
+    (TokenType.COMMA, r","),
+    (TokenType.SEMICOLON, r";"),
+    (TokenType.LPAREN, r"\("),
+    (TokenType.RPAREN, r"\)"),
+    (TokenType.DOT, r"\."),
+]
+
+
+class _ThompsonBuilder:
+    """
+    Parses one rule pattern and adds its Thompson fragment to a shared NFA.
+
+    Supported syntax: literals, escapes (\\n, \\t, \\r, \\x for any other x),
+    groups, '|', postfix '*', '+', '?' and classes like [a-z_] or [^'\\n].
+    """
+
+    def __init__(self, nfa, pattern: str):
+        self.nfa = nfa
+        self.pattern = pattern
+        self.pos = 0
+
+    def build(self):
+        start, end = self._expression()
+        if self.pos != len(self.pattern):
+            raise SpecError(f"Unexpected {self.pattern[self.pos]!r} in pattern {self.pattern!r}")
+        return start, end
+
+    def _current(self):
+        if self.pos < len(self.pattern):
+            return self.pattern[self.pos]
+        return None
+
+    def _expression(self):
+        start, end = self._term()
+        while self._current() == '|':
+            self.pos += 1
+            other_start, other_end = self._term()
+            fork, join = self.nfa.new_state(), self.nfa.new_state()
+            self.nfa.add_epsilon(fork, start)
+            self.nfa.add_epsilon(fork, other_start)
+            self.nfa.add_epsilon(end, join)
+            self.nfa.add_epsilon(other_end, join)
+            start, end = fork, join
+        return start, end
+
+    def _term(self):
+        start = end = self.nfa.new_state()
+        while self._current() is not None and self._current() not in '|)':
+            part_start, part_end = self._factor()
+            self.nfa.add_epsilon(end, part_start)
+            end = part_end
+        return start, end
+
+    def _factor(self):
+        start, end = self._base()
+        while self._current() is not None and self._current() in '*+?':
+            op = self.pattern[self.pos]
+            self.pos += 1
+            fork, join = self.nfa.new_state(), self.nfa.new_state()
+            self.nfa.add_epsilon(fork, start)
+            self.nfa.add_epsilon(end, join)
+            if op in '*?':
+                self.nfa.add_epsilon(fork, join)
+            if op in '*+':
+                self.nfa.add_epsilon(end, start)
+            start, end = fork, join
+        return start, end
+
+    def _base(self):
+        ch = self._current()
+        if ch is None:
+            raise SpecError(f"Unexpected end of pattern {self.pattern!r}")
+        if ch == '(':
+            self.pos += 1
+            start, end = self._expression()
+            if self._current() != ')':
+                raise SpecError(f"Missing ')' in pattern {self.pattern!r}")
+            self.pos += 1
+            return start, end
+        if ch == '[':
+            charset = self._char_class()
+        else:
+            charset = frozenset([self._codepoint(self._literal())])
+        start, end = self.nfa.new_state(), self.nfa.new_state()
+        self.nfa.add_edge(start, charset, end)
+        return start, end
+
+    def _literal(self):
+        ch = self.pattern[self.pos]
+        self.pos += 1
+        if ch == '\\':
+            if self.pos >= len(self.pattern):
+                raise SpecError(f"Dangling escape in pattern {self.pattern!r}")
+            ch = self.pattern[self.pos]
+            self.pos += 1
+            ch = ESCAPES.get(ch, ch)
+        return ch
+
+    def _char_class(self):
+        self.pos += 1  # consume '['
+        negated = self._current() == '^'
+        if negated:
+            self.pos += 1
+        members = set()
+        while self._current() != ']':
+            if self._current() is None:
+                raise SpecError(f"Missing ']' in pattern {self.pattern!r}")
+            low = self._literal()
+            if self._current() == '-' and self.pos + 1 < len(self.pattern) and self.pattern[self.pos + 1] != ']':
+                self.pos += 1
+                high = self._literal()
+                members.update(range(self._codepoint(low), self._codepoint(high) + 1))
+            else:
+                members.add(self._codepoint(low))
+        self.pos += 1  # consume ']'
+        if negated:
+            return UNIVERSE - members
+        return frozenset(members)
+
+    def _codepoint(self, ch):
+        code = ord(ch)
+        if code >= OTHER:
+            raise SpecError(f"Only ASCII characters are supported in patterns, got {ch!r}")
+        return code
+
+
+class _NFA:
+    def __init__(self):
+        self.count = 0
+        self.epsilon = {}
+        self.edges = {}
+        self.accept = {}
+
+    def new_state(self):
+        self.count += 1
+        return self.count - 1
+
+    def add_epsilon(self, src, dst):
+        self.epsilon.setdefault(src, []).append(dst)
+
+    def add_edge(self, src, charset, dst):
+        self.edges.setdefault(src, []).append((charset, dst))
+
+    def closure(self, state):
+        seen = {state}
+        stack = [state]
+        while stack:
+            for nxt in self.epsilon.get(stack.pop(), ()):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return seen
+
+
+class LexerTable:
+    """
+    Flat DFA produced by compile_spec().
+
+    class_of maps a character code (0..128, OTHER for non-ASCII) to a symbol class,
+    table[row + cls] is the row offset of the next state (-1 for the dead state)
+    and accept[row] is the rule index the state at that row accepts, or -1.
+    """
+
+    def __init__(self, rules, class_of, width, table, accept):
+        self.rules = rules
+        self.class_of = class_of
+        self.width = width
+        self.table = table
+        self.accept = accept
+
+    @property
+    def state_count(self):
+        return len(self.table) // self.width
+
+
+def compile_spec(spec):
+    """
+    Build a minimized DFA for a list of (TokenType, pattern[, converter]) rules.
+
+    Algorithm:
+    1. Thompson-construct one NFA per rule and join them under a common start state.
+    2. Split the character universe into classes that no pattern distinguishes.
+    3. Remove ε-moves and run the lab 2 subset construction over the classes.
+    4. Tag every DFA state with the earliest rule it accepts and minimize by
+       partition refinement, keeping states with different tags apart.
+    5. Renumber states and emit a flat row-major transition table.
+    """
+    rules = []
+    nfa = _NFA()
+    start = nfa.new_state()
+    for index, rule in enumerate(spec):
+        token_type, pattern = rule[0], rule[1]
+        convert = rule[2] if len(rule) > 2 else None
+        rules.append((token_type, convert))
+        rule_start, rule_end = _ThompsonBuilder(nfa, pattern).build()
+        nfa.add_epsilon(start, rule_start)
+        nfa.accept[rule_end] = index
+
+    # Symbol classes: characters with the same membership in every charset are interchangeable
+    charsets = list({charset for edges in nfa.edges.values() for charset, _ in edges})
+    signatures = {}
+    class_of = []
+    for code in range(OTHER + 1):
+        signature = tuple(code in charset for charset in charsets)
+        class_of.append(signatures.setdefault(signature, len(signatures)))
+    width = len(signatures)
+    classes_in = {
+        charset: sorted({class_of[code] for code in charset}) for charset in charsets
+    }
+
+    # ε-free NFA: δ'(q, a) = ∪ δ(p, a) for p in closure(q); q accepts the earliest rule in its closure
+    transitions = {}
+    accept_of = {}
+    for state in range(nfa.count):
+        closure = nfa.closure(state)
+        tags = [nfa.accept[p] for p in closure if p in nfa.accept]
+        if tags:
+            accept_of[state] = min(tags)
+        for p in closure:
+            for charset, dst in nfa.edges.get(p, ()):
+                for cls in classes_in[charset]:
+                    transitions.setdefault((state, cls), set()).add(dst)
+
+    fa = FiniteAutomaton(set(range(nfa.count)), set(range(width)), transitions, start, set(accept_of))
+    dfa, members = fa.to_dfa()
+
+    names = sorted(dfa.states, key=lambda name: int(name[1:]))
+    tag = {}
+    for name in names:
+        tags = [accept_of[q] for q in members[name] if q in accept_of]
+        tag[name] = min(tags) if tags else -1
+
+    def target(name, cls):
+        nxt = dfa.transitions.get((name, cls))
+        return next(iter(nxt)) if nxt else None
+
+    # Moore-style partition refinement; None stands for the implicit dead state
+    block = {name: tag[name] for name in names}
+    while True:
+        signatures = {}
+        refined = {}
+        for name in names:
+            signature = (block[name],) + tuple(
+                block.get(target(name, cls), None) for cls in range(width)
+            )
+            refined[name] = signatures.setdefault(signature, len(signatures))
+        if len(signatures) == len(set(block.values())):
+            block = refined
+            break
+        block = refined
+
+    # Renumber so the start state is row 0
+    order = {block[dfa.start_state]: 0}
+    for name in names:
+        order.setdefault(block[name], len(order))
+    table = [-1] * (len(order) * width)
+    accept = [-1] * (len(order) * width)
+    for name in names:
+        row = order[block[name]] * width
+        accept[row] = tag[name]
+        for cls in range(width):
+            nxt = target(name, cls)
+            if nxt is not None:
+                table[row + cls] = order[block[nxt]] * width
+
+    return LexerTable(rules, class_of, width, table, accept)
+
+
+_SQL_TABLE = None
+
+
+def sql_table():
+    # The SQL table is compiled once per process on first use
+    global _SQL_TABLE
+    if _SQL_TABLE is None:
+        _SQL_TABLE = compile_spec(SQL_SPEC)
+    return _SQL_TABLE
+
+
+class SpecLexer:
+    """
+    Table-driven lexer built from a token spec, with the same tokenize() interface as Lexer.
+
+    With the SQL spec it produces the same tokens and, for unterminated strings and
+    unexpected characters, the same LexerError messages and positions. It is not a full
+    drop-in replacement: the table works on ASCII, every other character is one OTHER
+    class, so non-ASCII identifiers such as 'é' that Lexer accepts are reported as
+    unexpected characters. There is no recovery mode (tokenize_with_errors) and no
+    lazy_positions option.
+    """
+
+    def __init__(self, source: str, table: LexerTable = None):
+        self.source = source
+        self.table = table if table is not None else sql_table()
+
+    def tokenize(self):
+        source = self.source
+        n = len(source)
+        rules = self.table.rules
+        class_of = self.table.class_of
+        other = class_of[OTHER]
+        table = self.table.table
+        accept = self.table.accept
+
+        tokens = []
+        pos = 0
+        line = 1
+        line_start = 0
+        while pos < n:
+            # Maximal munch: run the DFA as far as it goes, remember the last accepting position
+            row = 0
+            i = pos
+            last_rule = -1
+            last_end = pos
+            while i < n:
+                code = ord(source[i])
+                row = table[row + (class_of[code] if code < OTHER else other)]
+                if row < 0:
+                    break
+                i += 1
+                rule = accept[row]
+                if rule >= 0:
+                    last_rule = rule
+                    last_end = i
+
+            if last_rule < 0:
+                raise self._error_at(pos, line, line_start)
+
+            token_type, convert = rules[last_rule]
+            if token_type is not None:
+                text = source[pos:last_end]
+                value = convert(text) if convert is not None else text
+                tokens.append(Token(token_type, value, line, pos - line_start + 1))
+
+            newline = source.rfind('\n', pos, last_end)
+            if newline >= 0:
+                line += source.count('\n', pos, last_end)
+                line_start = newline + 1
+            pos = last_end
+
+        tokens.append(Token(TokenType.EOF, '', line, pos - line_start + 1))
+        return tokens
+
+    def _error_at(self, pos, line, line_start):
+        # No rule matches at pos. A quote can only fail as an unterminated string, which
+        # Lexer reports where the string breaks off rather than at the opening quote.
+        source = self.source
+        quote = source[pos]
+        if quote in ("'", '"'):
+            close = source.find(quote, pos + 1)
+            newline = source.find('\n', pos + 1)
+            if newline >= 0 and (close < 0 or newline < close):
+                return LexerError("Unterminated string (newline in string)", line, newline - line_start + 1)
+            if close < 0:
+                return LexerError("Unterminated string", line, len(source) - line_start + 1)
+        return LexerError(f"Unexpected character: {quote!r}", line, pos - line_start + 1)
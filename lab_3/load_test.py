@@ -0,0 +1,92 @@
+"""
+Load generator for token_server.py: reports p50/p99 latency and throughput.
+
+Usage:
+    python load_test.py                      # starts a server in-process on a free port
+    python load_test.py --port 8765          # uses a running server
+    python load_test.py --unix /tmp/lexer.sock --connections 8 --requests 20000
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from token_server import TokenizeClient, TokenizeServer
+
+QUERIES = [
+    "SELECT name, age FROM users WHERE age >= 18;",
+    "SELECT * FROM products ORDER BY price DESC LIMIT 10;",
+    "INSERT INTO students VALUES ('Nichita', 21, 3.85);",
+    "UPDATE employees SET salary = 5000.50 WHERE dept = 'IT' AND years > 3;",
+    "DELETE FROM orders WHERE status != 'completed';",
+    "SELECT u.name, o.total FROM users u JOIN orders o ON u.id = o.user_id;",
+]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _worker(client, count, in_flight, latencies, rng):
+    async def one():
+        source = rng.choice(QUERIES)
+        started = time.perf_counter()
+        await client.tokenize_raw(source)
+        latencies.append(time.perf_counter() - started)
+
+    remaining = count
+    while remaining > 0:
+        step = min(in_flight, remaining)
+        await asyncio.gather(*(one() for _ in range(step)))
+        remaining -= step
+
+
+async def run(args):
+    server = None
+    host, port, path = args.host, args.port, args.unix
+    if port is None and path is None:
+        server = TokenizeServer(workers=args.workers, batch_window=args.batch_window / 1000)
+        await server.start(host, 0)
+        port = server.address[1]
+
+    clients = [await TokenizeClient().connect(host, port, path) for _ in range(args.connections)]
+    rng = random.Random(args.seed)
+    latencies = []
+    per_client = args.requests // args.connections
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _worker(client, per_client, args.in_flight, latencies, rng) for client in clients
+    ))
+    elapsed = time.perf_counter() - started
+
+    for client in clients:
+        await client.close()
+    if server is not None:
+        await server.close()
+
+    latencies.sort()
+    print(f"Requests:   {len(latencies)} over {args.connections} connections")
+    print(f"Throughput: {len(latencies) / elapsed:,.0f} req/s")
+    print(f"Latency:    p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the tokenization server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--unix', default=None)
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--in-flight', type=int, default=32, help="concurrent requests per connection")
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=None, help="in-process server only")
+    parser.add_argument('--batch-window', type=float, default=2.0, help="ms, in-process server only")
+    parser.add_argument('--seed', type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
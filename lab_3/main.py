@@ -16,6 +16,19 @@ def print_tokens(label, source):
         print(f"  ERROR: {e}")
 
 
+def print_recovered(label, source):
+    # Tokenize in recovery mode and print tokens together with every error found.
+    print(f"\n {label}")
+    print(f"\n Input: {source}")
+    print("\n")
+
+    tokens, errors = Lexer(source).tokenize_with_errors()
+    for token in tokens:
+        print(f"  {token}")
+    for error in errors:
+        print(f"  ERROR: {error}")
+
+
 def main():
     print("  Lab 3: Lexer & Scanner")
     print("  Mini SQL-like Query Language Lexer")
@@ -80,6 +93,12 @@ def main():
         "SELECT name FROM users WHERE name = @invalid;"
     )
 
+    # 11. Error recovery: report every problem in one pass
+    print_recovered(
+        "11. Error recovery — all problems in one pass",
+        "SELECT name FROM users WHERE name = @invalid AND note = 'open\nOR id # 7;"
+    )
+
 
 if __name__ == '__main__':
     main()
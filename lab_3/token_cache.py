@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from typing import NamedTuple
+
+from lexer import Lexer, TokenType
+
+
+class CachedToken(NamedTuple):
+    # Immutable token shared between all callers that hit the same cache entry
+    type: TokenType
+    value: str
+    line: int
+    column: int
+
+    def __repr__(self):
+        return f"Token({self.type.name}, {self.value!r}, line={self.line}, col={self.column})"
+
+
+TOKEN_TYPES = {t.value: t for t in TokenType}
+
+# Bump when the payload layout changes; entries written by another version become misses
+FORMAT_VERSION = 1
+
+
+def format_tag(namespace: str) -> str:
+    # Payload version, the producing lexer and the TokenType numbering the ints refer to
+    types = ','.join(f"{t.name}={t.value}" for t in TokenType)
+    return f"v{FORMAT_VERSION}|{namespace}|{types}"
+
+
+def factory_name(lexer_factory) -> str:
+    module = getattr(lexer_factory, '__module__', None) or '?'
+    return f"{module}.{getattr(lexer_factory, '__qualname__', type(lexer_factory).__qualname__)}"
+
+
+def source_key(source: str, tag: str = '') -> str:
+    # 128-bit BLAKE2b digest of the tag and the UTF-8 source, used as the cache key and file name
+    digest = hashlib.blake2b(tag.encode('utf-8'), digest_size=16)
+    digest.update(b'\0')
+    digest.update(source.encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+def serialize(tokens) -> bytes:
+    # Compact form: one flat JSON array of [type, value, line, column] quadruples
+    flat = []
+    for token in tokens:
+        flat.extend((token.type.value, token.value, token.line, token.column))
+    return json.dumps(flat, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def deserialize(payload: bytes):
+    # Raises ValueError for a payload that is not a well-formed token stream
+    flat = json.loads(payload)
+    if not isinstance(flat, list) or not flat or len(flat) % 4:
+        raise ValueError("malformed token payload")
+    return tuple(
+        CachedToken(TOKEN_TYPES[flat[i]], flat[i + 1], flat[i + 2], flat[i + 3])
+        for i in range(0, len(flat), 4)
+    )
+
+
+class TokenCache:
+    """
+    Content-addressed cache in front of Lexer(source).tokenize().
+
+    The memory tier is an LRU bounded by max_entries and max_bytes (measured as the size
+    of the serialized token stream). When disk_dir is given, every new result is also
+    written there and memory misses are looked up on disk before lexing again.
+    Results are tuples of CachedToken, so a shared entry cannot be modified by a caller.
+    Lexer errors are never cached.
+
+    Keys cover the source and a format tag (payload version, TokenType numbering and
+    namespace), so caches sharing a disk_dir with different lexers or an older format
+    never read each other's entries. namespace defaults to the factory's qualified name;
+    pass one explicitly for factories without a stable name, such as lambdas or partials.
+    Disk entries that cannot be decoded are treated as misses and rewritten.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: str = None, lexer_factory=Lexer, namespace: str = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.lexer_factory = lexer_factory
+        self.tag = format_tag(namespace if namespace is not None else factory_name(lexer_factory))
+        self._entries = OrderedDict()  # key -> (tokens, size)
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def tokenize(self, source: str):
+        key = source_key(source, self.tag)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        payload = self._read_disk(key)
+        tokens = self._decode(payload) if payload is not None else None
+        if tokens is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            tokens = tuple(
+                CachedToken(t.type, t.value, t.line, t.column)
+                for t in self.lexer_factory(source).tokenize()
+            )
+            payload = serialize(tokens)
+            self._write_disk(key, payload)
+
+        self._store(key, tokens, len(payload))
+        return tokens
+
+    def _store(self, key, tokens, size):
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (tokens, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def _decode(self, payload):
+        # A truncated, corrupt or foreign entry is a miss, not an error
+        try:
+            return deserialize(payload)
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key + '.tok')
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        # Unreadable entries (missing, permission denied, ...) are misses, like corrupt ones
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, payload):
+        if self.disk_dir is None:
+            return
+        # Write to a uniquely named temporary file first so readers never see a partial
+        # entry and concurrent writers of one key never share a file. A failed write
+        # (disk full, permission denied) only skips the disk tier
+        tmp = None
+        try:
+            with tempfile.NamedTemporaryFile(dir=self.disk_dir, prefix=key + '.', suffix='.tmp',
+                                             delete=False) as f:
+                tmp = f.name
+                f.write(payload)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    def clear(self):
+        # Drop the memory tier; the disk tier is left untouched
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
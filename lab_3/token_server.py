@@ -0,0 +1,262 @@
+"""
+Tokenization sidecar: an asyncio server and client speaking newline-delimited JSON.
+
+Request:   {"id": 1, "source": "SELECT 1;"}
+Response:  {"id": 1, "tokens": [type, value, line, column, type, value, ...]}
+       or  {"id": 1, "error": "...", "line": 1, "column": 8}
+       or  {"id": 1, "error": "..."}   (not a lexer error: malformed request, server failure)
+
+Token types are TokenType values (ints), the token array is flat to keep responses small.
+Requests that arrive within batch_window seconds are grouped into one batch and lexed in
+a process pool, so the event loop never runs the lexer itself. When the request queue is
+full the server stops reading from the connection until there is room again.
+
+Usage:
+    python token_server.py --port 8765
+    python token_server.py --unix /tmp/lexer.sock
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from lexer import Lexer, LexerError
+from token_cache import serialize
+
+
+def tokenize_batch(sources):
+    # Runs in a worker process: returns (True, payload bytes) or (False, error dict) per source.
+    # A failure is confined to its own source so one bad request never fails the batch.
+    results = []
+    for source in sources:
+        try:
+            results.append((True, serialize(Lexer(source).tokenize())))
+        except LexerError as e:
+            results.append((False, {'error': str(e), 'line': e.line, 'column': e.column}))
+        except Exception as e:
+            results.append((False, {'error': f"{type(e).__name__}: {e}"}))
+    return results
+
+
+class TokenizeServer:
+    def __init__(self, workers: int = None, batch_window: float = 0.002, max_batch: int = 64,
+                 queue_size: int = 1024, executor=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.queue_size = queue_size
+        self.executor = executor
+        self._own_executor = executor is None
+        self._queue = None
+        self._slots = None
+        self._server = None
+        self._batcher = None
+        self._dispatches = set()  # strong references, so in-flight batches are not collected
+        self._connections = {}  # handler task -> writer
+
+    async def start(self, host: str = '127.0.0.1', port: int = None, path: str = None):
+        # Listen on a Unix socket when path is given, TCP otherwise
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.create_task(self._run_batches())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port or 0)
+        return self._server
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        # Safe before start() and after a start() that failed part way
+        if self._server is not None:
+            self._server.close()
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self._own_executor and self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    async def _handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        pending = set()
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    request_id, source = request['id'], request['source']
+                except (ValueError, KeyError, TypeError):
+                    writer.write(b'{"id":null,"error":"malformed request"}\n')
+                    await writer.drain()
+                    continue
+                if not isinstance(source, str):
+                    # The id is known, so the reply can still reach the caller waiting on it
+                    writer.write(json.dumps({'id': request_id, 'error': "malformed request"}).encode() + b'\n')
+                    await writer.drain()
+                    continue
+                future = loop.create_future()
+                # Blocks (and so stops reading this connection) while the queue is full
+                await self._queue.put((source, future))
+                task = asyncio.create_task(self._respond(writer, request_id, future))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[asyncio.current_task()]
+            writer.close()
+
+    async def _respond(self, writer, request_id, future):
+        try:
+            ok, result = await future
+        except Exception as e:
+            # The batch failed as a whole (e.g. a worker died); still answer this request
+            ok, result = False, {'error': f"{type(e).__name__}: {e}"}
+        head = json.dumps(request_id).encode()
+        if ok:
+            writer.write(b'{"id":' + head + b',"tokens":' + result + b'}\n')
+        else:
+            result['id'] = request_id
+            writer.write(json.dumps(result).encode() + b'\n')
+        await writer.drain()
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # At most one batch per worker in flight
+            await self._slots.acquire()
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, tokenize_batch, [s for s, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+
+class TokenizeClient:
+    """Client for TokenizeServer; many tokenize() calls can be in flight on one connection."""
+
+    def __init__(self):
+        self._reader = None
+        self._writer = None
+        self._ids = itertools.count()
+        self._waiting = {}
+        self._receiver = None
+
+    async def connect(self, host: str = '127.0.0.1', port: int = None, path: str = None):
+        if path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+        self._receiver = asyncio.create_task(self._receive())
+        return self
+
+    async def tokenize_raw(self, source: str):
+        # Returns the decoded response dict
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self._writer.write(json.dumps({'id': request_id, 'source': source}).encode() + b'\n')
+        await self._writer.drain()
+        return await future
+
+    async def tokenize(self, source: str):
+        # Returns a list of (type value, value, line, column) tuples; raises LexerError for
+        # lexer errors and RuntimeError for anything else the server reports
+        response = await self.tokenize_raw(source)
+        if 'error' in response:
+            if 'line' not in response:
+                raise RuntimeError(response['error'])
+            raise LexerError(response['error'].split(': ', 1)[-1], response['line'], response['column'])
+        flat = response['tokens']
+        return [tuple(flat[i:i + 4]) for i in range(0, len(flat), 4)]
+
+    async def _receive(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._waiting.pop(response['id'], None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError("connection closed by server"))
+        self._waiting.clear()
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        if self._receiver is not None:
+            self._receiver.cancel()
+
+
+async def _serve(args):
+    server = TokenizeServer(workers=args.workers, batch_window=args.batch_window / 1000,
+                            max_batch=args.max_batch, queue_size=args.queue_size)
+    await server.start(args.host, args.port, args.unix)
+    print(f"Listening on {args.unix or server.address}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lexer tokenization server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="Unix socket path (overrides --host/--port)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-window', type=float, default=2.0, help="milliseconds")
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--queue-size', type=int, default=1024)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+Batch sampler: draws many random strings from a pattern at once with NumPy.
+
+Node.sample walks the AST once per string. Here the AST is compiled once into a flat
+program, and every step of the program runs over a whole batch: alternation choices and
+repeat counts for all rows are drawn as integer arrays, and the output column (a NumPy
+object array of str) is extended piece by piece. The distribution is the same as
+Node.sample: every option of an alternation is equally likely and a repeat count is
+uniform between its minimum and min(maximum, max_repeat).
+
+Output depends only on the seed and the batch size.
+
+Usage:
+    python batch_sampler.py "(S|T)(U|V)w*Y+24" --count 10000000 --seed 1 --output out.txt
+"""
+import argparse
+import sys
+from typing import Iterator, List, Optional, TextIO, Tuple, Union
+
+import numpy as np
+
+from regex_generator import Alternation, CharClass, Concat, Empty, Literal, Node, RegexError, Repeat, compile_pattern
+
+# Program steps. A program is a list of steps; each step appends one piece to every row.
+#   ("lit", text)                       constant text
+#   ("choose", table, cumulative)       alternation of constants: table[choice]
+#   ("class", starts, offsets, size)    large character class: code point picked by index
+#   ("alt", [program, ...], cumulative) alternation: each option runs on the rows that chose it
+# cumulative holds running totals of the alternation weights, or None when options are uniform.
+#   ("rep", low, high, table)           repeat of a constant: table[count - low]
+#   ("loop", low, high, program)        repeat: copy j runs on the rows whose count is > j
+Step = Tuple
+Program = List[Step]
+
+# Classes up to this size are sampled from a table of their characters
+CLASS_TABLE_LIMIT = 1 << 16
+
+
+def _constant(program: Program) -> Optional[str]:
+    # The text of a program that always produces the same string, else None
+    if all(step[0] == "lit" for step in program):
+        return "".join(step[1] for step in program)
+    return None
+
+
+def _emit(program: Program, step: Step) -> None:
+    # Append a step, merging adjacent constants
+    if step[0] == "lit":
+        if not step[1]:
+            return
+        if program and program[-1][0] == "lit":
+            program[-1] = ("lit", program[-1][1] + step[1])
+            return
+    program.append(step)
+
+
+def compile_program(node: Node, max_repeat: int, program: Optional[Program] = None) -> Program:
+    if program is None:
+        program = []
+    if isinstance(node, Empty):
+        pass
+    elif isinstance(node, Literal):
+        _emit(program, ("lit", node.value))
+    elif isinstance(node, CharClass):
+        # An empty class emits nothing, as Node.sample does
+        if node.size == 1:
+            _emit(program, ("lit", node.char_at(0)))
+        elif 1 < node.size <= CLASS_TABLE_LIMIT:
+            table = np.array([chr(code) for lo, hi in node.ranges for code in range(lo, hi)], dtype=object)
+            _emit(program, ("choose", table, None))
+        elif node.size:
+            starts = np.array([lo for lo, _ in node.ranges], dtype=np.int64)
+            widths = np.array([hi - lo for lo, hi in node.ranges], dtype=np.int64)
+            offsets = np.cumsum(widths) - widths
+            _emit(program, ("class", starts, offsets, node.size))
+    elif isinstance(node, Concat):
+        for part in node.parts:
+            compile_program(part, max_repeat, program)
+    elif isinstance(node, Alternation):
+        options = [compile_program(option, max_repeat) for option in node.options]
+        constants = [_constant(option) for option in options]
+        if len(options) == 1:
+            for step in options[0]:
+                _emit(program, step)
+        else:
+            cumulative = None if node.weights is None else np.cumsum(np.array(node.weights, dtype=np.int64))
+            if all(text is not None for text in constants):
+                _emit(program, ("choose", np.array(constants, dtype=object), cumulative))
+            else:
+                _emit(program, ("alt", options, cumulative))
+    elif isinstance(node, Repeat):
+        if node.max_times < node.min_times:
+            return program
+        low, high = node.min_times, min(node.max_times, max_repeat)
+        high = max(high, low)
+        child = compile_program(node.child, max_repeat)
+        text = _constant(child)
+        if low == high and text is not None:
+            _emit(program, ("lit", text * low))
+        elif text is not None:
+            table = np.array([text * n for n in range(low, high + 1)], dtype=object)
+            _emit(program, ("rep", low, high, table))
+        else:
+            _emit(program, ("loop", low, high, child))
+    else:
+        raise RegexError(f"Cannot compile node {type(node).__name__}")
+    return program
+
+
+def _choose(count: int, cumulative: Optional[np.ndarray], size: int, rng: np.random.Generator) -> np.ndarray:
+    # Option indices for `size` rows, uniform or proportional to the weights
+    if cumulative is None:
+        return rng.integers(count, size=size)
+    return np.searchsorted(cumulative, rng.integers(cumulative[-1], size=size), side="right")
+
+
+def _run(program: Program, size: int, rng: np.random.Generator) -> np.ndarray:
+    # Strings for `size` rows of one program
+    out = np.full(size, "", dtype=object)
+    if size == 0:
+        return out
+    for step in program:
+        op = step[0]
+        if op == "lit":
+            out += step[1]
+        elif op == "choose":
+            table = step[1]
+            out += table[_choose(len(table), step[2], size, rng)]
+        elif op == "class":
+            starts, offsets = step[1], step[2]
+            index = rng.integers(step[3], size=size)
+            which = np.searchsorted(offsets, index, side="right") - 1
+            codes = starts[which] + index - offsets[which]
+            out += np.array([chr(code) for code in codes.tolist()], dtype=object)
+        elif op == "alt":
+            options = step[1]
+            choice = _choose(len(options), step[2], size, rng)
+            piece = np.empty(size, dtype=object)
+            for i, option in enumerate(options):
+                rows = np.flatnonzero(choice == i)
+                piece[rows] = _run(option, len(rows), rng)
+            out += piece
+        elif op == "rep":
+            low, high, table = step[1], step[2], step[3]
+            out += table[rng.integers(0, high - low + 1, size=size)]
+        else:
+            low, high, child = step[1], step[2], step[3]
+            counts = rng.integers(low, high + 1, size=size)
+            for copy in range(high):
+                rows = np.flatnonzero(counts > copy)
+                if len(rows) == 0:
+                    break
+                out[rows] += _run(child, len(rows), rng)
+    return out
+
+
+class BatchSampler:
+    def __init__(self, pattern: str, max_repeat: int = 5, seed: Union[int, np.random.SeedSequence, None] = None):
+        self.pattern = compile_pattern(pattern, max_repeat)
+        self.program = compile_program(self.pattern.ast, max_repeat)
+        self.rng = np.random.default_rng(seed)
+
+    def sample(self, count: int) -> np.ndarray:
+        # One batch as an object array of str
+        return _run(self.program, count, self.rng)
+
+    def iter_samples(self, count: int, batch_size: int = 100_000) -> Iterator[str]:
+        # Stream `count` strings, holding at most one batch in memory
+        remaining = count
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            yield from self.sample(size).tolist()
+            remaining -= size
+
+    def write(self, out: Union[str, TextIO], count: int, batch_size: int = 100_000) -> None:
+        # One string per line, to a path or an open text file
+        if isinstance(out, str):
+            with open(out, "w", encoding="utf-8") as f:
+                self.write(f, count, batch_size)
+            return
+        remaining = count
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            out.write("\n".join(self.sample(size).tolist()))
+            out.write("\n")
+            remaining -= size
+
+
+def sample_batch(pattern: str, count: int, max_repeat: int = 5, seed: Optional[int] = None) -> List[str]:
+    return BatchSampler(pattern, max_repeat, seed).sample(count).tolist()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sample random strings from a regex in batches")
+    parser.add_argument("pattern")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--max-repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--output", help="file to write to (default: stdout)")
+    args = parser.parse_args()
+    sampler = BatchSampler(args.pattern, args.max_repeat, args.seed)
+    sampler.write(args.output or sys.stdout, args.count, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
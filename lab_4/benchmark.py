@@ -0,0 +1,75 @@
+"""
+Generation and sampling benchmark for the AST simplification pass.
+
+Every pattern is parsed twice, as written and simplified, and each operation is timed on
+both ASTs (best of --repeat runs). Generated lists are compared before timing. The
+generation cache is cleared before every generate/iter_generate run, so those rows time
+a cold expansion rather than cache hits.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --patterns "(a|b)*c" "(foo|bar)+" "a{1,3}" --samples 50000
+"""
+import argparse
+import random
+import time
+
+from main import REGEXES
+from regex_generator import GENERATION_CACHE, compile_pattern
+
+
+def best_time(run, repeat, setup=None):
+    # setup runs before every timed call, outside the timing
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def operations(pattern, max_repeat, max_results, samples):
+    ast = pattern.ast
+    return {
+        'generate': lambda: ast.generate(max_repeat, max_results),
+        'iter_generate': lambda: list(pattern.generate(max_results)),
+        'sample': lambda: [ast.sample(max_repeat) for _ in range(samples)],
+    }
+
+
+# Operations whose results are memoized in GENERATION_CACHE
+CACHED = {'generate', 'iter_generate'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the regex AST simplification pass")
+    # One argument per pattern: counted repeats such as a{1,3} contain commas
+    parser.add_argument('--patterns', nargs='+', default=list(REGEXES), metavar='PATTERN')
+    parser.add_argument('--max-repeat', type=int, default=5)
+    parser.add_argument('--max-results', type=int, default=1000)
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"  {'pattern':<24} {'operation':<14} {'parsed ms':>10} {'simplified ms':>14} {'speedup':>8}")
+    for text in args.patterns:
+        plain = compile_pattern(text, args.max_repeat, optimize=False)
+        simple = compile_pattern(text, args.max_repeat, optimize=True)
+        if plain.generate(args.max_results) != simple.generate(args.max_results):
+            raise SystemExit(f"{text}: simplified AST generates different strings")
+        before = operations(plain, args.max_repeat, args.max_results, args.samples)
+        after = operations(simple, args.max_repeat, args.max_results, args.samples)
+        for name in before:
+            setup = GENERATION_CACHE.clear if name in CACHED else None
+            random.seed(0)
+            old = best_time(before[name], args.repeat, setup)
+            random.seed(0)
+            new = best_time(after[name], args.repeat, setup)
+            print(f"  {text:<24} {name:<14} {old * 1000:>10.2f} {new * 1000:>14.2f} {old / new:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,11 @@
 from regex_generator import generate_random_strings
 
+REGEXES = [
+    "(S|T)(U|V)w*Y+24",
+    "L(M|N)O{3}P*Q(2|3)",
+    "R*S(T|U|V)W(X|Y|Z){2}",
+]
+
 
 def print_generation(label: str, pattern: str, max_repeat: int = 5, count: int = 20) -> None:
     print(f"\n{label}")
@@ -19,13 +25,7 @@ def main() -> None:
     print("Lab 4: Regular Expressions")
     print("Variant 4")
 
-    regexes = [
-        "(S|T)(U|V)w*Y+24",
-        "L(M|N)O{3}P*Q(2|3)",
-        "R*S(T|U|V)W(X|Y|Z){2}",
-    ]
-
-    for idx, pattern in enumerate(regexes, start=1):
+    for idx, pattern in enumerate(REGEXES, start=1):
         print_generation(f"Example {idx}", pattern)
 
 
@@ -0,0 +1,153 @@
+"""
+Parallel, reproducible sampling across a process pool.
+
+The requested count is cut into fixed-size shards. Shard i draws from its own stream,
+SeedSequence(seed, spawn_key=(i,)), which is the i-th child SeedSequence(seed).spawn()
+would give. Shards are independent of each other and of which worker runs them, and
+results are put back together in shard order, so the output for a seed is the same with
+1 worker or 64. seed=None draws one fresh SeedSequence in the caller and derives every
+shard from its entropy the same way (pass an int to make a run repeatable).
+
+With distinct=True duplicates are dropped globally, keeping first occurrences in shard
+order, and further shards are drawn until count strings are collected. Drawing stops
+early once a whole shard adds nothing new (the language is exhausted or nearly so).
+
+Usage:
+    python parallel_sampler.py "(S|T)(U|V)w*Y+24" --count 10000000 --seed 1 --workers 8
+"""
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from batch_sampler import BatchSampler
+
+
+def _shard_seed(seed: int, index: int) -> np.random.SeedSequence:
+    return np.random.SeedSequence(seed, spawn_key=(index,))
+
+
+def sample_shard(pattern: str, max_repeat: int, seed: int, index: int, size: int) -> List[str]:
+    # Runs in a worker process
+    return BatchSampler(pattern, max_repeat, _shard_seed(seed, index)).sample(size).tolist()
+
+
+def _run_shards(pattern: str, max_repeat: int, seed: int, sizes, executor: Optional[Executor],
+                prefetch: int) -> Iterator[List[str]]:
+    # Shard results in index order; keeps at most `prefetch` shards in flight
+    if executor is None:
+        for index, size in enumerate(sizes):
+            yield sample_shard(pattern, max_repeat, seed, index, size)
+        return
+    pending = deque()
+    sizes = iter(sizes)
+    index = 0
+    try:
+        while True:
+            while len(pending) < prefetch:
+                size = next(sizes, None)
+                if size is None:
+                    break
+                pending.append(executor.submit(sample_shard, pattern, max_repeat, seed, index, size))
+                index += 1
+            if not pending:
+                return
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _sizes(count: int, shard_size: int) -> Iterator[int]:
+    while count > 0:
+        yield min(shard_size, count)
+        count -= shard_size
+
+
+def _endless(shard_size: int) -> Iterator[int]:
+    while True:
+        yield shard_size
+
+
+def iter_parallel_samples(
+    pattern: str,
+    count: int,
+    seed: Optional[int] = 0,
+    workers: Optional[int] = None,
+    max_repeat: int = 5,
+    distinct: bool = False,
+    shard_size: int = 100_000,
+) -> Iterator[str]:
+    """
+    Stream `count` samples generated by `workers` processes (default: one per CPU;
+    1 runs in-process). The output depends on seed and shard_size, never on workers.
+    """
+    if seed is None:
+        # One root for the whole run; per-shard fresh entropy would make shards unrelated
+        seed = np.random.SeedSequence().entropy
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    sizes = _endless(shard_size) if distinct else _sizes(count, shard_size)
+    try:
+        shards = _run_shards(pattern, max_repeat, seed, sizes, executor, 2 * workers)
+        if not distinct:
+            for shard in shards:
+                yield from shard
+            return
+        seen = set()
+        for shard in shards:
+            added = 0
+            for value in shard:
+                if value not in seen:
+                    seen.add(value)
+                    added += 1
+                    yield value
+                    if len(seen) >= count:
+                        return
+            if not added:
+                return
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def parallel_sample(
+    pattern: str,
+    count: int,
+    seed: Optional[int] = 0,
+    workers: Optional[int] = None,
+    max_repeat: int = 5,
+    distinct: bool = False,
+    shard_size: int = 100_000,
+) -> List[str]:
+    return list(iter_parallel_samples(pattern, count, seed, workers, max_repeat, distinct, shard_size))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sample random strings from a regex on several processes")
+    parser.add_argument("pattern")
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-repeat", type=int, default=5)
+    parser.add_argument("--distinct", action="store_true", help="drop duplicates across all shards")
+    parser.add_argument("--shard-size", type=int, default=100_000)
+    parser.add_argument("--output", help="file to write to (default: stdout)")
+    args = parser.parse_args()
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for value in iter_parallel_samples(args.pattern, args.count, args.seed, args.workers,
+                                           args.max_repeat, args.distinct, args.shard_size):
+            out.write(value)
+            out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
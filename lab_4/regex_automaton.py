@@ -0,0 +1,530 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+import regex_generator
+from regex_generator import Alternation, CharClass, Concat, Empty, Literal, Node, RegexError, Repeat
+
+
+# Thompson NFA: edges carry half-open code point ranges [lo, hi).
+class NFA:
+    def __init__(self) -> None:
+        self.epsilon: List[List[int]] = []
+        self.edges: List[List[Tuple[int, int, int]]] = []
+
+    def new_state(self) -> int:
+        self.epsilon.append([])
+        self.edges.append([])
+        return len(self.epsilon) - 1
+
+    def add_epsilon(self, src: int, dst: int) -> None:
+        self.epsilon[src].append(dst)
+
+    def add_range(self, src: int, lo: int, hi: int, dst: int) -> None:
+        self.edges[src].append((lo, hi, dst))
+
+    def closure(self, states) -> FrozenSet[int]:
+        seen = set(states)
+        stack = list(states)
+        while stack:
+            for nxt in self.epsilon[stack.pop()]:
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        return frozenset(seen)
+
+    def closure_masks(self) -> List[int]:
+        # ε-closure of every state as a bitmask, sharing the work along ε-paths
+        masks: List[Optional[int]] = [None] * len(self.epsilon)
+        for root in range(len(self.epsilon)):
+            if masks[root] is not None:
+                continue
+            stack = [root]
+            while stack:
+                state = stack[-1]
+                pending = [nxt for nxt in self.epsilon[state] if masks[nxt] is None and nxt not in stack]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                if masks[state] is not None:
+                    continue
+                mask = 1 << state
+                for nxt in self.epsilon[state]:
+                    # Thompson fragments for bounded repeats have no ε-cycles, but stay safe
+                    mask |= masks[nxt] if masks[nxt] is not None else 1 << nxt
+                masks[state] = mask
+        return masks
+
+
+def build_nfa(node: Node, nfa: NFA) -> Tuple[int, int]:
+    # Add a Thompson fragment for node and return its (start, end) states.
+    if isinstance(node, Empty):
+        state = nfa.new_state()
+        return state, state
+    if isinstance(node, Literal):
+        start = current = nfa.new_state()
+        for ch in node.value:
+            nxt = nfa.new_state()
+            nfa.add_range(current, ord(ch), ord(ch) + 1, nxt)
+            current = nxt
+        return start, current
+    if isinstance(node, CharClass):
+        # One range edge per class range, however many characters it covers
+        start, end = nfa.new_state(), nfa.new_state()
+        for lo, hi in node.ranges:
+            nfa.add_range(start, lo, hi, end)
+        return start, end
+    if isinstance(node, Concat):
+        start = end = nfa.new_state()
+        for part in node.parts:
+            part_start, part_end = build_nfa(part, nfa)
+            nfa.add_epsilon(end, part_start)
+            end = part_end
+        return start, end
+    if isinstance(node, Alternation):
+        start, end = nfa.new_state(), nfa.new_state()
+        for option in node.options:
+            opt_start, opt_end = build_nfa(option, nfa)
+            nfa.add_epsilon(start, opt_start)
+            nfa.add_epsilon(opt_end, end)
+        return start, end
+    if isinstance(node, Repeat):
+        start = end = nfa.new_state()
+        if node.max_times < node.min_times:
+            # Empty language: the end state is unreachable
+            return start, nfa.new_state()
+        # x{m,n} = x...x (m copies) followed by n-m nested optional copies
+        for _ in range(node.min_times):
+            part_start, part_end = build_nfa(node.child, nfa)
+            nfa.add_epsilon(end, part_start)
+            end = part_end
+        optional_ends = []
+        for _ in range(node.max_times - node.min_times):
+            part_start, part_end = build_nfa(node.child, nfa)
+            nfa.add_epsilon(end, part_start)
+            optional_ends.append(end)
+            end = part_end
+        for skip in optional_ends:
+            nfa.add_epsilon(skip, end)
+        return start, end
+    raise RegexError(f"Cannot compile node {type(node).__name__}")
+
+
+class DFA:
+    """
+    Array-backed DFA over symbol classes.
+
+    bounds splits the code points into classes: class k covers [bounds[k], bounds[k + 1]).
+    table[state * width + k] is the next state or -1, accepting[state] is 1 for final states.
+    State 0 is the start state.
+    """
+
+    def __init__(self, bounds: List[int], table: array, accepting: bytearray) -> None:
+        self.bounds = bounds
+        self.width = max(len(bounds) - 1, 0)
+        self.table = table
+        self.accepting = accepting
+        self._classes: Dict[str, int] = {}
+        self._moves: Optional[List[List[Tuple[int, int, int]]]] = None
+        self._reach: List[bytearray] = []
+        self._state_counts: Optional[List[List[int]]] = None
+
+    @property
+    def state_count(self) -> int:
+        return len(self.accepting)
+
+    def class_of(self, ch: str) -> int:
+        # Symbol class of a character, -1 when no transition can read it
+        cls = self._classes.get(ch)
+        if cls is None:
+            idx = bisect_right(self.bounds, ord(ch)) - 1
+            cls = idx if 0 <= idx < self.width else -1
+            self._classes[ch] = cls
+        return cls
+
+    def match_length(self, text: str) -> Optional[int]:
+        # Length of the longest accepted prefix of text, or None
+        table, width, accepting = self.table, self.width, self.accepting
+        state = 0
+        best = 0 if accepting[0] else None
+        for i, ch in enumerate(text):
+            cls = self.class_of(ch)
+            if cls < 0:
+                break
+            state = table[state * width + cls]
+            if state < 0:
+                break
+            if accepting[state]:
+                best = i + 1
+        return best
+
+    def accepts(self, text: str) -> bool:
+        table, width = self.table, self.width
+        state = 0
+        for ch in text:
+            cls = self.class_of(ch)
+            if cls < 0:
+                return False
+            state = table[state * width + cls]
+            if state < 0:
+                return False
+        return bool(self.accepting[state])
+
+    def moves(self, state: int) -> List[Tuple[int, int, int]]:
+        # Outgoing (lo, hi, next state) code point ranges of a state, in code point order
+        if self._moves is None:
+            width, bounds, table = self.width, self.bounds, self.table
+            self._moves = [
+                [(bounds[cls], bounds[cls + 1], table[q * width + cls])
+                 for cls in range(width) if table[q * width + cls] >= 0]
+                for q in range(self.state_count)
+            ]
+        return self._moves[state]
+
+    def reach(self, length: int) -> bytearray:
+        # reach(r)[q] is 1 when some string of exactly r symbols leads from q to a final state
+        while len(self._reach) <= length:
+            if not self._reach:
+                self._reach.append(bytearray(self.accepting))
+                continue
+            previous = self._reach[-1]
+            self._reach.append(bytearray(
+                1 if any(previous[nxt] for _, _, nxt in self.moves(q)) else 0
+                for q in range(self.state_count)
+            ))
+        return self._reach[length]
+
+    def _post_order(self) -> Optional[List[int]]:
+        # States in DFS post-order from the start state, None when there is a cycle
+        done = [False] * self.state_count
+        on_path = [False] * self.state_count
+        order: List[int] = []
+        stack = [(0, iter(self.moves(0)))]
+        on_path[0] = True
+        while stack:
+            state, edges = stack[-1]
+            edge = next(edges, None)
+            if edge is not None:
+                nxt = edge[2]
+                if on_path[nxt]:
+                    return None
+                if not done[nxt]:
+                    on_path[nxt] = True
+                    stack.append((nxt, iter(self.moves(nxt))))
+                continue
+            stack.pop()
+            on_path[state] = False
+            done[state] = True
+            order.append(state)
+        return order
+
+    def state_counts(self) -> List[List[int]]:
+        """
+        state_counts()[q][n] is the number of distinct strings of length n accepted from q.
+
+        Each state's count polynomial is built from its successors in reverse topological
+        order: f_q = [q is final] + sum over moves of (range size) * x * f_next. Counts are
+        Python ints, so they are exact however large they get.
+        """
+        if self._state_counts is None:
+            order = self._post_order()
+            if order is None:
+                raise RegexError("Language is infinite")
+            counts: List[List[int]] = [[] for _ in range(self.state_count)]
+            for state in order:
+                poly = [1] if self.accepting[state] else []
+                for lo, hi, nxt in self.moves(state):
+                    tail = counts[nxt]
+                    if not tail:
+                        continue
+                    if len(poly) < len(tail) + 1:
+                        poly.extend([0] * (len(tail) + 1 - len(poly)))
+                    size = hi - lo
+                    for n, c in enumerate(tail):
+                        poly[n + 1] += size * c
+                counts[state] = poly
+            self._state_counts = counts
+        return self._state_counts
+
+    def length_counts(self) -> List[int]:
+        # Number of accepted strings of every length, index = length
+        return self.state_counts()[0]
+
+    def unrank(self, index: int, length: int) -> str:
+        # The index-th accepted string of the given length in lexicographic order
+        counts = self.state_counts()
+        if not 0 <= index < (counts[0][length] if length < len(counts[0]) else 0):
+            raise IndexError("string index out of range")
+        out: List[str] = []
+        state = 0
+        for remaining in range(length - 1, -1, -1):
+            for lo, hi, nxt in self.moves(state):
+                tail = counts[nxt]
+                per_char = tail[remaining] if remaining < len(tail) else 0
+                block = (hi - lo) * per_char
+                if index < block:
+                    offset, index = divmod(index, per_char)
+                    out.append(chr(lo + offset))
+                    state = nxt
+                    break
+                index -= block
+        return "".join(out)
+
+    def longest(self) -> Optional[int]:
+        # Length of the longest accepted string, None if the language is infinite, -1 if empty
+        if self._post_order() is None:
+            return None
+        return len(self.length_counts()) - 1
+
+    def _candidates(self, state: int, remaining: int, bound: Optional[str]) -> Iterator[Tuple[str, int, bool]]:
+        # (char, next state, equal to bound) for every char that can still finish in time
+        live = self.reach(remaining - 1)
+        low = -1 if bound is None else ord(bound)
+        for lo, hi, nxt in self.moves(state):
+            if not live[nxt] or hi <= low:
+                continue
+            if lo <= low:
+                yield bound, nxt, True
+                lo = low + 1
+            for code in range(lo, hi):
+                yield chr(code), nxt, False
+
+    def iter_length(self, length: int, after: Optional[str] = None) -> Iterator[str]:
+        # Accepted strings of exactly `length` chars in lexicographic order, strictly after `after`
+        if not self.reach(length)[0]:
+            return
+        if length == 0:
+            if after is None:
+                yield ""
+            return
+        path = [""] * length
+        frames = [self._candidates(0, length, after[0] if after is not None else None)]
+        while frames:
+            depth = len(frames) - 1
+            item = next(frames[-1], None)
+            if item is None:
+                frames.pop()
+                continue
+            ch, nxt, tight = item
+            path[depth] = ch
+            if depth + 1 == length:
+                if not tight:
+                    yield "".join(path)
+                continue
+            frames.append(self._candidates(nxt, length - depth - 1, after[depth + 1] if tight else None))
+
+    def iter_shortlex(self, after: Optional[str] = None) -> Iterator[str]:
+        """
+        Yield every accepted string exactly once in shortlex order (by length, then by
+        code point). Enumeration resumes strictly after `after` when it is given, so
+        a large language can be paged with islice(iter_shortlex(last_of_previous_page), size).
+        """
+        limit = self.longest()
+        length = 0
+        if after is not None:
+            length = len(after)
+        while limit is None or length <= limit:
+            yield from self.iter_length(length, after)
+            after = None
+            length += 1
+
+
+def _symbol_bounds(nfa: NFA) -> List[int]:
+    points = set()
+    for edges in nfa.edges:
+        for lo, hi, _ in edges:
+            points.add(lo)
+            points.add(hi)
+    return sorted(points)
+
+
+def determinize(nfa: NFA, start: int, end: int) -> DFA:
+    """
+    Subset construction followed by partition-refinement minimization.
+
+    The alphabet is the set of symbol classes induced by all edge ranges, so a range
+    edge becomes one transition per class instead of one per character.
+    """
+    bounds = _symbol_bounds(nfa)
+    width = max(len(bounds) - 1, 0)
+    # Class span [first, last) covered by every edge
+    spans = [
+        [(bisect_left(bounds, lo), bisect_left(bounds, hi), dst) for lo, hi, dst in edges]
+        for edges in nfa.edges
+    ]
+
+    # Subsets are int bitmasks; ε-closures are precomputed per NFA state and OR-ed together
+    closures = nfa.closure_masks()
+    reading = 0
+    for state, edges in enumerate(spans):
+        if edges:
+            reading |= 1 << state
+
+    start_set = closures[start]
+    index = {start_set: 0}
+    subsets = [start_set]
+    transitions: List[List[int]] = []
+    pos = 0
+    while pos < len(subsets):
+        remaining = subsets[pos] & reading
+        pos += 1
+        moves: Dict[int, int] = {}
+        while remaining:
+            low = remaining & -remaining
+            remaining ^= low
+            for first, last, dst in spans[low.bit_length() - 1]:
+                for cls in range(first, last):
+                    moves[cls] = moves.get(cls, 0) | closures[dst]
+        row = [-1] * width
+        for cls, target in moves.items():
+            if target not in index:
+                index[target] = len(subsets)
+                subsets.append(target)
+            row[cls] = index[target]
+        transitions.append(row)
+
+    accepting = [bool(subset >> end & 1) for subset in subsets]
+    return _minimize(bounds, transitions, accepting)
+
+
+def _minimize(bounds: List[int], transitions: List[List[int]], accepting: List[bool]) -> DFA:
+    width = max(len(bounds) - 1, 0)
+    count = len(transitions)
+
+    # Drop states that cannot reach an accepting state; they behave like the dead state
+    reverse: List[List[int]] = [[] for _ in range(count)]
+    for state, row in enumerate(transitions):
+        for target in row:
+            if target >= 0:
+                reverse[target].append(state)
+    live = [False] * count
+    stack = [s for s in range(count) if accepting[s]]
+    for s in stack:
+        live[s] = True
+    while stack:
+        for prev in reverse[stack.pop()]:
+            if not live[prev]:
+                live[prev] = True
+                stack.append(prev)
+
+    def target(state: int, cls: int) -> int:
+        nxt = transitions[state][cls]
+        return nxt if nxt >= 0 and live[nxt] else -1
+
+    if not live[0]:
+        # The start state cannot reach a final state: the language is empty
+        return DFA(bounds, array('i', [-1] * width), bytearray(1))
+    states = [s for s in range(count) if live[s]]
+
+    block = _hopcroft(states, width, target, accepting)
+
+    # Renumber blocks so that the start state is 0
+    order = {block[0]: 0}
+    for s in states:
+        order.setdefault(block[s], len(order))
+    table = array('i', [-1] * (len(order) * width))
+    final = bytearray(len(order))
+    for s in states:
+        row = order[block[s]]
+        final[row] = 1 if accepting[s] else 0
+        for cls in range(width):
+            nxt = target(s, cls)
+            if nxt >= 0:
+                table[row * width + cls] = order[block[nxt]]
+    return DFA(bounds, table, final)
+
+
+def _hopcroft(states: List[int], width: int, target, accepting: List[bool]) -> Dict[int, int]:
+    """
+    Hopcroft partition refinement: returns state -> block for the live states.
+
+    The dead state is kept as an explicit member (-1) so that missing transitions take
+    part in the splitting like any other target.
+    """
+    dead = -1
+    inverse: List[Dict[int, List[int]]] = [{} for _ in range(width)]
+    for s in states:
+        for cls in range(width):
+            inverse[cls].setdefault(target(s, cls), []).append(s)
+    for cls in range(width):
+        inverse[cls].setdefault(dead, []).append(dead)
+
+    final = {s for s in states if accepting[s]}
+    rest = {s for s in states if not accepting[s]} | {dead}
+    blocks = [b for b in (final, rest) if b]
+    block_of: Dict[int, int] = {}
+    for idx, members in enumerate(blocks):
+        for s in members:
+            block_of[s] = idx
+
+    smallest = min(range(len(blocks)), key=lambda idx: len(blocks[idx]))
+    work = {(smallest, cls) for cls in range(width)}
+    while work:
+        splitter, cls = work.pop()
+        predecessors = [p for q in blocks[splitter] for p in inverse[cls].get(q, ())]
+        touched: Dict[int, List[int]] = {}
+        for p in predecessors:
+            touched.setdefault(block_of[p], []).append(p)
+        for idx, members in touched.items():
+            if len(members) == len(blocks[idx]):
+                continue
+            moved = set(members)
+            blocks[idx] -= moved
+            new_idx = len(blocks)
+            blocks.append(moved)
+            for p in moved:
+                block_of[p] = new_idx
+            for c in range(width):
+                if (idx, c) in work:
+                    work.add((new_idx, c))
+                else:
+                    work.add((new_idx if len(moved) <= len(blocks[idx]) else idx, c))
+    del block_of[dead]
+    return block_of
+
+
+class CompiledRegex:
+    """A lab 4 pattern compiled to a minimal DFA. Repeats are bounded by max_repeat, as in generation."""
+
+    def __init__(self, pattern: str, max_repeat: int, ast: Node, dfa: DFA) -> None:
+        self.pattern = pattern
+        self.max_repeat = max_repeat
+        self.ast = ast
+        self.dfa = dfa
+
+    def match(self, text: str) -> Optional[str]:
+        # Longest prefix of text in the language, or None
+        length = self.dfa.match_length(text)
+        if length is None:
+            return None
+        return text[:length]
+
+    def fullmatch(self, text: str) -> bool:
+        return self.dfa.accepts(text)
+
+    def iter_shortlex(self, after: Optional[str] = None) -> Iterator[str]:
+        # Duplicate-free enumeration of the language in shortlex order, see DFA.iter_shortlex
+        return self.dfa.iter_shortlex(after)
+
+    def __repr__(self) -> str:
+        return f"CompiledRegex({self.pattern!r}, max_repeat={self.max_repeat}, states={self.dfa.state_count})"
+
+
+def compile_ast(ast: Node) -> DFA:
+    nfa = NFA()
+    start, end = build_nfa(ast, nfa)
+    return determinize(nfa, start, end)
+
+
+def compile(pattern: str, max_repeat: int = 5) -> CompiledRegex:
+    # The single matching entry point; shares the parsed AST and the DFA with the cached
+    # regex_generator.Pattern
+    return _cached_regex(pattern, max_repeat)
+
+
+@lru_cache(maxsize=256)
+def _cached_regex(pattern: str, max_repeat: int) -> CompiledRegex:
+    parsed = regex_generator.compile_pattern(pattern, max_repeat)
+    return CompiledRegex(pattern, max_repeat, parsed.ast, parsed.automaton)
@@ -1,6 +1,12 @@
 import random
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from fractions import Fraction
+from functools import lru_cache
+from math import gcd
+from itertools import accumulate, islice
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 
 class RegexError(Exception):
@@ -58,6 +64,9 @@ class Tokenizer:
                 tokens.append(Token("LITERAL", esc))
                 self._advance()
                 continue
+            if ch == "[":
+                tokens.append(Token("CLASS", self._read_class()))
+                continue
             if ch in "()|*+?{} ,":
                 if ch == " ":
                     self._advance()
@@ -92,10 +101,103 @@ class Tokenizer:
         tokens.append(Token("EOF"))
         return tokens
 
+    def _read_class(self) -> str:
+        # Raw body of [...]; a ']' right after '[' or '[^' is a literal
+        self._advance()
+        start = self.pos
+        if self._current() == "^":
+            self._advance()
+        if self._current() == "]":
+            self._advance()
+        while self._current() != "]":
+            if self._current() is None:
+                raise RegexError("Unterminated character class")
+            if self._current() == "\\":
+                self._advance()
+                if self._current() is None:
+                    raise RegexError("Dangling escape at end of pattern")
+            self._advance()
+        body = self.source[start:self.pos]
+        self._advance()
+        return body
+
+
+class _GenerationCache:
+    # Bounded LRU of generate() results shared by every AST
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[str, ...]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[Tuple[str, ...]]:
+        values = self._entries.get(key)
+        if values is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return values
+
+    def put(self, key: tuple, values: Tuple[str, ...]) -> None:
+        self._entries[key] = values
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+
+GENERATION_CACHE = _GenerationCache()
+
 
 # AST node definitions.
 class Node:
     def generate(self, max_repeat: int, max_results: int) -> List[str]:
+        # Memoized on the structure of the subtree, so identical subpatterns anywhere
+        # (in this AST or another one) are expanded once per (max_repeat, max_results).
+        key = (self.structure_key(), max_repeat, max_results)
+        values = GENERATION_CACHE.get(key)
+        if values is None:
+            values = tuple(self._generate(max_repeat, max_results))
+            GENERATION_CACHE.put(key, values)
+        return list(values)
+
+    def _generate(self, max_repeat: int, max_results: int) -> List[str]:
+        raise NotImplementedError
+
+    def structure_key(self) -> tuple:
+        # Hashable description of the subtree, computed once per node
+        key = self.__dict__.get("_structure_key")
+        if key is None:
+            key = self._structure()
+            self._structure_key = key
+        return key
+
+    def _structure(self) -> tuple:
+        raise NotImplementedError
+
+    def iter_generate(self, max_repeat: int, max_results: int) -> Iterator[str]:
+        # Lazy version of generate(): yields the same values in the same order and shares
+        # its cache entries. A subtree read to the end is stored; one abandoned early is not.
+        key = (self.structure_key(), max_repeat, max_results)
+        values = GENERATION_CACHE.get(key)
+        if values is not None:
+            yield from values
+            return
+        produced: List[str] = []
+        for value in islice(self._iter_generate(max_repeat, max_results), max_results):
+            produced.append(value)
+            if len(produced) == max_results:
+                # Complete already; stored before the consumer gets a chance to stop
+                GENERATION_CACHE.put(key, tuple(produced))
+            yield value
+        if len(produced) < max_results:
+            GENERATION_CACHE.put(key, tuple(produced))
+
+    def _iter_generate(self, max_repeat: int, max_results: int) -> Iterator[str]:
         raise NotImplementedError
 
     def sample(self, max_repeat: int) -> str:
@@ -104,9 +206,15 @@ class Node:
 
 @dataclass
 class Empty(Node):
-    def generate(self, max_repeat: int, max_results: int) -> List[str]:
+    def _structure(self) -> tuple:
+        return ("Empty",)
+
+    def _generate(self, max_repeat: int, max_results: int) -> List[str]:
         return [""]
 
+    def _iter_generate(self, max_repeat: int, max_results: int) -> Iterator[str]:
+        yield ""
+
     def sample(self, max_repeat: int) -> str:
         return ""
 
@@ -115,26 +223,150 @@ class Empty(Node):
 class Literal(Node):
     value: str
 
-    def generate(self, max_repeat: int, max_results: int) -> List[str]:
+    def _structure(self) -> tuple:
+        return ("Literal", self.value)
+
+    def _generate(self, max_repeat: int, max_results: int) -> List[str]:
         return [self.value]
 
+    def _iter_generate(self, max_repeat: int, max_results: int) -> Iterator[str]:
+        yield self.value
+
     def sample(self, max_repeat: int) -> str:
         return self.value
 
 
+# Negated classes are taken relative to printable ASCII, so generated strings stay printable.
+CLASS_UNIVERSE = ((0x20, 0x7F),)
+
+
+def _merge_ranges(ranges: Iterable[Tuple[int, int]]) -> Tuple[Tuple[int, int], ...]:
+    merged: List[List[int]] = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return tuple((lo, hi) for lo, hi in merged)
+
+
+def _complement(ranges: Tuple[Tuple[int, int], ...]) -> Tuple[Tuple[int, int], ...]:
+    out: List[Tuple[int, int]] = []
+    for lo, hi in CLASS_UNIVERSE:
+        for a, b in ranges:
+            if b <= lo or a >= hi:
+                continue
+            if a > lo:
+                out.append((lo, a))
+            lo = max(lo, b)
+        if lo < hi:
+            out.append((lo, hi))
+    return tuple(out)
+
+
+@dataclass
+class CharClass(Node):
+    # Sorted, disjoint, half-open code point ranges [lo, hi)
+    ranges: Tuple[Tuple[int, int], ...]
+    _offsets: List[int] = field(init=False, repr=False, compare=False)
+    _chars: Optional[Tuple[str, ...]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.ranges = _merge_ranges(self.ranges)
+        # _offsets[i] is the index of the first character of ranges[i]
+        self._offsets = [0]
+        for lo, hi in self.ranges:
+            self._offsets.append(self._offsets[-1] + hi - lo)
+        # Small classes keep their characters, so sampling is a single random.choice
+        self._chars = None
+        if self.size <= 256:
+            self._chars = tuple(chr(code) for lo, hi in self.ranges for code in range(lo, hi))
+
+    @classmethod
+    def parse(cls, body: str) -> "CharClass":
+        # Body of [...]: single characters, a-z ranges, escapes, optional leading ^
+        negate = body.startswith("^")
+        chars: List[str] = []
+        is_range: List[bool] = []
+        pos = 1 if negate else 0
+        while pos < len(body):
+            ch = body[pos]
+            escaped = ch == "\\"
+            if escaped:
+                pos += 1
+                ch = body[pos]
+            chars.append(ch)
+            # An unescaped '-' between two characters joins them into a range
+            is_range.append(not escaped and ch == "-")
+            pos += 1
+        ranges: List[Tuple[int, int]] = []
+        i = 0
+        while i < len(chars):
+            if i + 2 < len(chars) and is_range[i + 1]:
+                lo, hi = ord(chars[i]), ord(chars[i + 2])
+                if lo > hi:
+                    raise RegexError(f"Invalid class range {chars[i]}-{chars[i + 2]}")
+                ranges.append((lo, hi + 1))
+                i += 3
+            else:
+                ranges.append((ord(chars[i]), ord(chars[i]) + 1))
+                i += 1
+        node = cls(tuple(ranges))
+        if negate:
+            node = cls(_complement(node.ranges))
+        return node
+
+    def _structure(self) -> tuple:
+        return ("CharClass", self.ranges)
+
+    @property
+    def size(self) -> int:
+        return self._offsets[-1]
+
+    def char_at(self, index: int) -> str:
+        # index-th character in code point order
+        i = bisect_right(self._offsets, index) - 1
+        return chr(self.ranges[i][0] + index - self._offsets[i])
+
+    def __contains__(self, ch: str) -> bool:
+        code = ord(ch)
+        i = bisect_right(self.ranges, (code, float("inf"))) - 1
+        return i >= 0 and code < self.ranges[i][1]
+
+    def _generate(self, max_repeat: int, max_results: int) -> List[str]:
+        return list(islice(self._iter_generate(max_repeat, max_results), max_results))
+
+    def _iter_generate(self, max_repeat: int, max_results: int) -> Iterator[str]:
+        for lo, hi in self.ranges:
+            for code in range(lo, hi):
+                yield chr(code)
+
+    def sample(self, max_repeat: int) -> str:
+        if self._chars is not None:
+            return random.choice(self._chars) if self._chars else ""
+        return self.char_at(random.randrange(self.size))
+
+
 @dataclass
 class Concat(Node):
     parts: List[Node]
 
-    def generate(self, max_repeat: int, max_results: int) -> List[str]:
+    def _structure(self) -> tuple:
+        return ("Concat",) + tuple(part.structure_key() for part in self.parts)
+
+    def _generate(self, max_repeat: int, max_results: int) -> List[str]:
         results = [""]
         for part in self.parts:
             next_values = part.generate(max_repeat, max_results)
             results = _concat_lists(results, next_values, max_results)
-            if len(results) >= max_results:
-                return results[:max_results]
+            if not results:
+                return results
         return results
 
+    def _iter_generate(self, max_repeat: int, max_results: int) -> Iterator[str]:
+        seqs = [_LazyList(islice(part.iter_generate(max_repeat, max_results), max_results)) for part in self.parts]
+        return _lazy_product(seqs)
+
     def sample(self, max_repeat: int) -> str:
         return "".join(part.sample(max_repeat) for part in self.parts)
 
@@ -142,8 +374,26 @@ class Concat(Node):
 @dataclass
 class Alternation(Node):
     options: List[Node]
-
-    def generate(self, max_repeat: int, max_results: int) -> List[str]:
+    # Relative sampling weights; None means every option is equally likely
+    weights: Optional[List[int]] = None
+    _slots: Optional[Tuple[Node, ...]] = field(init=False, repr=False, compare=False)
+    _cum_weights: Optional[List[int]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._slots = self._cum_weights = None
+        if self.weights is None:
+            return
+        if sum(self.weights) <= 64:
+            # Each option repeated by its weight: a weighted pick is one random.choice
+            self._slots = tuple(o for o, w in zip(self.options, self.weights) for _ in range(w))
+        else:
+            self._cum_weights = list(accumulate(self.weights))
+
+    def _structure(self) -> tuple:
+        # Weights only affect sampling, so they are not part of the key
+        return ("Alternation",) + tuple(option.structure_key() for option in self.options)
+
+    def _generate(self, max_repeat: int, max_results: int) -> List[str]:
         seen = set()
         out: List[str] = []
         for opt in self.options:
@@ -155,8 +405,24 @@ class Alternation(Node):
                     return out[:max_results]
         return out
 
+    def _iter_generate(self, max_repeat: int, max_results: int) -> Iterator[str]:
+        # The seen set only ever holds values already yielded, so it is bounded by max_results.
+        seen = set()
+        for opt in self.options:
+            for value in islice(opt.iter_generate(max_repeat, max_results), max_results):
+                if value not in seen:
+                    seen.add(value)
+                    yield value
+                    if len(seen) >= max_results:
+                        return
+
     def sample(self, max_repeat: int) -> str:
-        choice = random.choice(self.options)
+        if self.weights is None:
+            choice = random.choice(self.options)
+        elif self._slots is not None:
+            choice = random.choice(self._slots)
+        else:
+            choice = random.choices(self.options, cum_weights=self._cum_weights)[0]
         return choice.sample(max_repeat)
 
 
@@ -166,30 +432,44 @@ class Repeat(Node):
     min_times: int
     max_times: int
 
-    def generate(self, max_repeat: int, max_results: int) -> List[str]:
-        max_times = self.max_times
-        if max_times < self.min_times:
+    def _structure(self) -> tuple:
+        return ("Repeat", self.child.structure_key(), self.min_times, self.max_times)
+
+    def _generate(self, max_repeat: int, max_results: int) -> List[str]:
+        if self.max_times < self.min_times:
             return []
         base = self.child.generate(max_repeat, max_results)
         results: List[str] = []
-        for count in range(self.min_times, max_times + 1):
-            if count == 0:
-                results.append("")
-                if len(results) >= max_results:
-                    return results[:max_results]
-                continue
-            current = [""]
-            for _ in range(count):
+        # Each power is built from the previous one, so {m,n} costs n concatenation passes
+        current = [""]
+        for count in range(self.max_times + 1):
+            if count:
                 current = _concat_lists(current, base, max_results)
-                if len(current) >= max_results:
-                    current = current[:max_results]
+                if not current:
                     break
+            if count < self.min_times:
+                continue
             for value in current:
                 results.append(value)
                 if len(results) >= max_results:
-                    return results[:max_results]
+                    return results
         return results
 
+    def _iter_generate(self, max_repeat: int, max_results: int) -> Iterator[str]:
+        if self.max_times < self.min_times:
+            return
+        # Every power reads from the same memoized child values, and each one is the lazy
+        # product of the previous power and the child, as in _generate.
+        base = _LazyList(islice(self.child.iter_generate(max_repeat, max_results), max_results))
+        power = _LazyList([""])
+        for count in range(self.max_times + 1):
+            if count:
+                power = _LazyList(islice(_lazy_product([power, base]), max_results))
+                if power.is_empty():
+                    return
+            if count >= self.min_times:
+                yield from power
+
     def sample(self, max_repeat: int) -> str:
         if self.max_times < self.min_times:
             return ""
@@ -199,10 +479,11 @@ class Repeat(Node):
 
 
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: List[Token], max_repeat: int = 5):
         self.tokens = tokens
         self.pos = 0
         self.steps: List[str] = []
+        self.max_repeat = max_repeat
 
     def _current(self) -> Token:
         return self.tokens[self.pos]
@@ -303,10 +584,165 @@ class Parser:
             self._advance()
             self.steps.append(f"Read literal '{tok.value}'")
             return Literal(tok.value)
+        if tok.type == "CLASS":
+            self._advance()
+            self.steps.append(f"Read class [{tok.value}]")
+            return CharClass.parse(tok.value)
         raise RegexError(f"Unexpected token: {tok.type}")
 
     def _repeat_cap(self) -> int:
-        return 5
+        return self.max_repeat
+
+
+# AST simplification. Every rewrite keeps the values and order of generate() and
+# iter_generate() and the distribution of sample(); when alternations are flattened or
+# factored, weights keep each original option as likely as it was before.
+
+def simplify(node: Node, max_repeat: int) -> Node:
+    if isinstance(node, Concat):
+        return _simplify_concat([simplify(part, max_repeat) for part in node.parts])
+    if isinstance(node, Alternation):
+        options = [simplify(option, max_repeat) for option in node.options]
+        weights = node.weights or [1] * len(options)
+        return _simplify_alternation(options, [Fraction(w) for w in weights])
+    if isinstance(node, Repeat):
+        return _simplify_repeat(simplify(node.child, max_repeat), node.min_times, node.max_times, max_repeat)
+    if isinstance(node, Literal) and not node.value:
+        return Empty()
+    return node
+
+
+def _simplify_concat(parts: List[Node]) -> Node:
+    # Flatten nested concatenations, drop Empty, merge adjacent literals into runs
+    flat: List[Node] = []
+    for part in parts:
+        for item in part.parts if isinstance(part, Concat) else [part]:
+            if isinstance(item, Empty) or isinstance(item, Literal) and not item.value:
+                continue
+            if isinstance(item, Literal) and flat and isinstance(flat[-1], Literal):
+                flat[-1] = Literal(flat[-1].value + item.value)
+            else:
+                flat.append(item)
+    if not flat:
+        return Empty()
+    if len(flat) == 1:
+        return flat[0]
+    return Concat(flat)
+
+
+def _leading_text(node: Node) -> str:
+    if isinstance(node, Literal):
+        return node.value
+    if isinstance(node, Concat) and isinstance(node.parts[0], Literal):
+        return node.parts[0].value
+    return ""
+
+
+def _drop_prefix(node: Node, size: int) -> Node:
+    if isinstance(node, Literal):
+        return _simplify_concat([Literal(node.value[size:])])
+    head = node.parts[0].value[size:]
+    return _simplify_concat([Literal(head)] + node.parts[1:])
+
+
+def _common_prefix(a: str, b: str) -> str:
+    size = 0
+    while size < min(len(a), len(b)) and a[size] == b[size]:
+        size += 1
+    return a[:size]
+
+
+def _simplify_alternation(options: List[Node], weights: List[Fraction]) -> Node:
+    # Flatten nested alternations, splitting the weight of the nested one over its options
+    flat: List[Node] = []
+    flat_weights: List[Fraction] = []
+    for option, weight in zip(options, weights):
+        if isinstance(option, Alternation):
+            inner = option.weights or [1] * len(option.options)
+            for inner_option, inner_weight in zip(option.options, inner):
+                flat.append(inner_option)
+                flat_weights.append(weight * inner_weight / sum(inner))
+        else:
+            flat.append(option)
+            flat_weights.append(weight)
+
+    # A repeated option only ever yields duplicates, so it folds into its first occurrence
+    unique: List[Node] = []
+    unique_weights: List[Fraction] = []
+    for option, weight in zip(flat, flat_weights):
+        for i, seen in enumerate(unique):
+            if seen == option:
+                unique_weights[i] += weight
+                break
+        else:
+            unique.append(option)
+            unique_weights.append(weight)
+    if len(unique) == 1:
+        return unique[0]
+
+    # Ascending single characters with equal weights: a character class draws the same way
+    codes = [ord(o.value) if isinstance(o, Literal) and len(o.value) == 1 else None for o in unique]
+    if None not in codes and codes == sorted(set(codes)) and len(set(unique_weights)) == 1:
+        return CharClass(tuple((code, code + 1) for code in codes))
+
+    # Factor the common literal prefix out of runs of adjacent options
+    factored: List[Node] = []
+    factored_weights: List[Fraction] = []
+    i = 0
+    while i < len(unique):
+        prefix = _leading_text(unique[i])
+        j = i + 1
+        while j < len(unique) and prefix:
+            common = _common_prefix(prefix, _leading_text(unique[j]))
+            if not common:
+                break
+            prefix = common
+            j += 1
+        if j - i > 1:
+            rest = _simplify_alternation(
+                [_drop_prefix(option, len(prefix)) for option in unique[i:j]], unique_weights[i:j]
+            )
+            factored.append(_simplify_concat([Literal(prefix), rest]))
+            factored_weights.append(sum(unique_weights[i:j]))
+        else:
+            factored.append(unique[i])
+            factored_weights.append(unique_weights[i])
+        i = j
+    if len(factored) == 1:
+        return factored[0]
+    return Alternation(factored, _integer_weights(factored_weights))
+
+
+def _integer_weights(weights: List[Fraction]) -> Optional[List[int]]:
+    # Smallest proportional integers, or None when all weights are equal
+    if len(set(weights)) == 1:
+        return None
+    scale = 1
+    for weight in weights:
+        scale = scale * weight.denominator // gcd(scale, weight.denominator)
+    ints = [int(weight * scale) for weight in weights]
+    divisor = 0
+    for value in ints:
+        divisor = gcd(divisor, value)
+    return [value // divisor for value in ints]
+
+
+def _simplify_repeat(child: Node, min_times: int, max_times: int, max_repeat: int) -> Node:
+    # Only fixed counts are collapsed: a range of ranges changes the generation order
+    if min_times != max_times:
+        return Repeat(child, min_times, max_times)
+    if min_times == 0 or isinstance(child, Empty):
+        return Empty()
+    if min_times == 1:
+        return child
+    if isinstance(child, Literal):
+        return Literal(child.value * min_times)
+    if isinstance(child, Repeat) and child.min_times == child.max_times:
+        times = child.min_times * min_times
+        # Node.sample caps counts at max_repeat, so only merge within that cap
+        if times <= max_repeat:
+            return Repeat(child.child, times, times)
+    return Repeat(child, min_times, max_times)
 
 
 def _concat_lists(left: List[str], right: List[str], max_results: int) -> List[str]:
@@ -319,19 +755,156 @@ def _concat_lists(left: List[str], right: List[str], max_results: int) -> List[s
     return out
 
 
-def generate_strings(pattern: str, max_repeat: int = 5, max_results: int = 30) -> Tuple[List[str], List[str]]:
-    tokenizer = Tokenizer(pattern)
-    tokens = tokenizer.tokenize()
-    parser = Parser(tokens)
-    # Override repeat cap for this run.
-    def _cap_override(self) -> int:
-        return max_repeat
-    parser._repeat_cap = _cap_override.__get__(parser, Parser)
+class _LazyList:
+    # Memoizing view of an iterator: values are pulled only when a consumer first needs them.
+    def __init__(self, source: Iterable[str]):
+        self._source = iter(source)
+        self._values: List[str] = []
+        self._done = False
+
+    def _get(self, index: int) -> Optional[str]:
+        while len(self._values) <= index and not self._done:
+            value = next(self._source, None)
+            if value is None:
+                self._done = True
+                # Drop the exhausted source (and whatever it holds, such as a previous power)
+                self._source = iter(())
+            else:
+                self._values.append(value)
+        if index < len(self._values):
+            return self._values[index]
+        return None
+
+    def is_empty(self) -> bool:
+        return self._get(0) is None
+
+    def __iter__(self) -> Iterator[str]:
+        index = 0
+        while True:
+            value = self._get(index)
+            if value is None:
+                return
+            yield value
+            index += 1
+
+
+def _lazy_product(seqs: List[_LazyList]) -> Iterator[str]:
+    # Cartesian product in the same left-major order as _concat_lists, produced on demand.
+    # The odometer state lives in the generator, so a consumer can stop and resume at will.
+    if any(seq.is_empty() for seq in seqs):
+        return
+    n = len(seqs)
+    if n == 0:
+        yield ""
+        return
+    iters = [iter(seqs[0])] + [iter(())] * (n - 1)
+    prefix = [""] * (n + 1)
+    depth = 0
+    while depth >= 0:
+        value = next(iters[depth], None)
+        if value is None:
+            depth -= 1
+            continue
+        prefix[depth + 1] = prefix[depth] + value
+        if depth + 1 == n:
+            yield prefix[n]
+        else:
+            depth += 1
+            iters[depth] = iter(seqs[depth])
+
+
+class Pattern:
+    """
+    A parsed pattern plus the tables derived from it, built once and shared by every call.
+
+    The sampling tables and the automaton are created on first use. Pattern objects are
+    cached by compile_pattern(), so treat the AST and steps as read-only. Matching goes
+    through regex_automaton.compile(), which reuses this AST and automaton.
+    """
+
+    def __init__(self, pattern: str, max_repeat: int, optimize: bool = True) -> None:
+        self.pattern = pattern
+        self.max_repeat = max_repeat
+        parser = Parser(Tokenizer(pattern).tokenize(), max_repeat=max_repeat)
+        self.ast = parser.parse()
+        if optimize:
+            self.ast = simplify(self.ast, max_repeat)
+        self.steps: Tuple[str, ...] = tuple(parser.steps)
+        self._sampler = None
+        self._automaton = None
+
+    @property
+    def sampler(self):
+        if self._sampler is None:
+            from regex_sampler import WeightedSampler
+            self._sampler = WeightedSampler(self.ast, automaton=self.automaton)
+        return self._sampler
+
+    @property
+    def automaton(self):
+        if self._automaton is None:
+            from regex_automaton import compile_ast
+            self._automaton = compile_ast(self.ast)
+        return self._automaton
+
+    def generate(self, max_results: int = 30) -> List[str]:
+        return list(islice(self.ast.iter_generate(self.max_repeat, max_results), max_results))
+
+    def sample(
+        self,
+        count: int = 20,
+        max_attempts: int = 200,
+        uniform: bool = False,
+        length: Optional[int] = None,
+    ) -> List[str]:
+        # uniform=True draws distinct strings uniformly from the bounded language (optionally
+        # of one length) with the WeightedSampler instead of rejection on Node.sample.
+        if uniform:
+            return self.sampler.sample_many(count, length, distinct=True)
+        results: List[str] = []
+        seen = set()
+        attempts = 0
+        while len(results) < count and attempts < max_attempts:
+            value = self.ast.sample(self.max_repeat)
+            attempts += 1
+            if value in seen:
+                continue
+            seen.add(value)
+            results.append(value)
+        return results
 
-    ast = parser.parse()
+    def count(self, length: Optional[int] = None) -> int:
+        # Exact number of distinct strings (all lengths, or one length)
+        counts = self.automaton.length_counts()
+        if length is None:
+            return sum(counts)
+        return counts[length] if 0 <= length < len(counts) else 0
 
-    results = ast.generate(max_repeat, max_results)
-    return results, parser.steps
+    def __repr__(self) -> str:
+        return f"Pattern({self.pattern!r}, max_repeat={self.max_repeat})"
+
+
+def compile_pattern(pattern: str, max_repeat: int = 5, optimize: bool = True) -> Pattern:
+    # Positional arguments only, so every call form hits the same cache entry
+    return _cached_pattern(pattern, max_repeat, optimize)
+
+
+@lru_cache(maxsize=256)
+def _cached_pattern(pattern: str, max_repeat: int, optimize: bool) -> Pattern:
+    return Pattern(pattern, max_repeat, optimize)
+
+
+def count(pattern: str, max_repeat: int = 5, length: Optional[int] = None) -> int:
+    """
+    Number of distinct strings the pattern produces with repeats capped at max_repeat,
+    without enumerating them. The result is an exact Python int.
+    """
+    return compile_pattern(pattern, max_repeat).count(length)
+
+
+def generate_strings(pattern: str, max_repeat: int = 5, max_results: int = 30) -> Tuple[List[str], List[str]]:
+    compiled = compile_pattern(pattern, max_repeat)
+    return compiled.generate(max_results), list(compiled.steps)
 
 
 def generate_random_strings(
@@ -339,24 +912,8 @@ def generate_random_strings(
     max_repeat: int = 5,
     count: int = 20,
     max_attempts: int = 200,
+    uniform: bool = False,
+    length: Optional[int] = None,
 ) -> Tuple[List[str], List[str]]:
-    tokenizer = Tokenizer(pattern)
-    tokens = tokenizer.tokenize()
-    parser = Parser(tokens)
-
-    def _cap_override(self) -> int:
-        return max_repeat
-    parser._repeat_cap = _cap_override.__get__(parser, Parser)
-
-    ast = parser.parse()
-    results: List[str] = []
-    seen = set()
-    attempts = 0
-    while len(results) < count and attempts < max_attempts:
-        value = ast.sample(max_repeat)
-        attempts += 1
-        if value in seen:
-            continue
-        seen.add(value)
-        results.append(value)
-    return results, parser.steps
+    compiled = compile_pattern(pattern, max_repeat)
+    return compiled.sample(count, max_attempts, uniform, length), list(compiled.steps)
@@ -0,0 +1,206 @@
+import random
+from typing import Dict, Iterator, List, Optional
+
+from regex_automaton import DFA, compile_ast
+from regex_generator import Alternation, CharClass, Concat, Empty, Literal, Node, RegexError, Repeat
+
+
+def convolve(left: List[int], right: List[int]) -> List[int]:
+    # Product of two length-indexed count polynomials
+    if not left or not right:
+        return []
+    out = [0] * (len(left) + len(right) - 1)
+    for i, a in enumerate(left):
+        if a:
+            for j, b in enumerate(right):
+                if b:
+                    out[i + j] += a * b
+    return out
+
+
+def add_counts(left: List[int], right: List[int]) -> List[int]:
+    if len(left) < len(right):
+        left, right = right, left
+    out = list(left)
+    for i, b in enumerate(right):
+        out[i] += b
+    return out
+
+
+def _trim(counts: List[int]) -> List[int]:
+    # Drop trailing zero coefficients
+    end = len(counts)
+    while end and not counts[end - 1]:
+        end -= 1
+    return counts[:end]
+
+
+def _at(counts: List[int], length: int) -> int:
+    return counts[length] if 0 <= length < len(counts) else 0
+
+
+class WeightedSampler:
+    """
+    Uniform sampler over the bounded language of a parsed pattern.
+
+    counts(node)[n] is the number of ways node produces a string of length n. The tables
+    are built once per AST; after that every sample is an unranking of a random index, which
+    walks the AST once and picks each split point from the precomputed counts.
+
+    Derivation counts overcount ambiguous patterns such as (a|aa)*, where one string has
+    several derivations. The per-length totals are therefore checked against the exact
+    counts of the minimal DFA; when they differ, indices are unranked on the DFA instead,
+    which keeps sampling uniform over distinct strings.
+    """
+
+    def __init__(self, ast: Node, rng: Optional[random.Random] = None, automaton: Optional[DFA] = None):
+        self.ast = ast
+        self.rng = rng if rng is not None else random
+        self._counts: Dict[int, List[int]] = {}
+        self._suffixes: Dict[int, List[List[int]]] = {}
+        self._powers: Dict[int, List[List[int]]] = {}
+        self.automaton = automaton if automaton is not None else compile_ast(ast)
+        derivations = self._build(ast)
+        exact = self.automaton.length_counts()
+        self.ambiguous = _trim(derivations) != exact
+        self._total = exact
+
+    def _build(self, node: Node) -> List[int]:
+        key = id(node)
+        if key in self._counts:
+            return self._counts[key]
+        if isinstance(node, Empty):
+            counts = [1]
+        elif isinstance(node, Literal):
+            counts = [0] * len(node.value) + [1]
+        elif isinstance(node, CharClass):
+            counts = [0, node.size]
+        elif isinstance(node, Concat):
+            # suffixes[i] counts the concatenation of parts[i:]
+            suffixes = [[1]]
+            for part in reversed(node.parts):
+                suffixes.append(convolve(self._build(part), suffixes[-1]))
+            suffixes.reverse()
+            self._suffixes[key] = suffixes
+            counts = suffixes[0]
+        elif isinstance(node, Alternation):
+            counts = []
+            for option in node.options:
+                counts = add_counts(counts, self._build(option))
+        elif isinstance(node, Repeat):
+            child = self._build(node.child)
+            # powers[n] counts exactly n copies of the child
+            powers = [[1]]
+            for _ in range(max(node.max_times, 0)):
+                powers.append(convolve(powers[-1], child))
+            self._powers[key] = powers
+            counts = []
+            for n in range(node.min_times, node.max_times + 1):
+                counts = add_counts(counts, powers[n])
+        else:
+            raise RegexError(f"Cannot count node {type(node).__name__}")
+        self._counts[key] = counts
+        return counts
+
+    def counts(self, node: Optional[Node] = None) -> List[int]:
+        return self._counts[id(node if node is not None else self.ast)]
+
+    def derivations(self, length: Optional[int] = None) -> int:
+        # Number of parse trees rather than strings
+        counts = self.counts()
+        return sum(counts) if length is None else _at(counts, length)
+
+    def total(self, length: Optional[int] = None) -> int:
+        # Number of distinct strings (all lengths, or one length)
+        if length is None:
+            return sum(self._total)
+        return _at(self._total, length)
+
+    def unrank(self, index: int, length: Optional[int] = None) -> str:
+        # The index-th string (of the given length, or over all lengths by increasing length)
+        if length is None:
+            for length, count in enumerate(self._total):
+                if index < count:
+                    break
+                index -= count
+            else:
+                raise IndexError("string index out of range")
+        elif not 0 <= index < self.total(length):
+            raise IndexError("string index out of range")
+        if self.ambiguous:
+            return self.automaton.unrank(index, length)
+        out: List[str] = []
+        self._unrank(self.ast, length, index, out)
+        return "".join(out)
+
+    def _unrank(self, node: Node, length: int, index: int, out: List[str]) -> None:
+        if isinstance(node, Literal):
+            out.append(node.value)
+        elif isinstance(node, CharClass):
+            out.append(node.char_at(index))
+        elif isinstance(node, Concat):
+            suffixes = self._suffixes[id(node)]
+            for i, part in enumerate(node.parts):
+                length, index = self._split(self.counts(part), suffixes[i + 1], length, index, part, out)
+        elif isinstance(node, Alternation):
+            for option in node.options:
+                count = _at(self.counts(option), length)
+                if index < count:
+                    self._unrank(option, length, index, out)
+                    return
+                index -= count
+        elif isinstance(node, Repeat):
+            powers = self._powers[id(node)]
+            for n in range(node.min_times, node.max_times + 1):
+                count = _at(powers[n], length)
+                if index < count:
+                    child = self.counts(node.child)
+                    for copy in range(n, 0, -1):
+                        length, index = self._split(child, powers[copy - 1], length, index, node.child, out)
+                    return
+                index -= count
+
+    def _split(self, head: List[int], rest: List[int], length: int, index: int, node: Node, out: List[str]):
+        # Choose the head length so that index falls in its block, emit the head, return what is left
+        for size in range(min(length, len(head) - 1) + 1):
+            rest_count = _at(rest, length - size)
+            block = head[size] * rest_count
+            if index < block:
+                head_index, rest_index = divmod(index, rest_count)
+                self._unrank(node, size, head_index, out)
+                return length - size, rest_index
+            index -= block
+        raise IndexError("derivation index out of range")
+
+    def sample(self, length: Optional[int] = None) -> str:
+        total = self.total(length)
+        if total == 0:
+            raise RegexError("Pattern produces no strings" + (f" of length {length}" if length is not None else ""))
+        return self.unrank(self.rng.randrange(total), length)
+
+    def _distinct_indices(self, total: int) -> Iterator[int]:
+        # Random string indices without repetition: rejection while most indices are
+        # still free, then a shuffle of whatever is left.
+        seen = set()
+        while len(seen) * 2 < total:
+            index = self.rng.randrange(total)
+            if index not in seen:
+                seen.add(index)
+                yield index
+        rest = [index for index in range(total) if index not in seen]
+        self.rng.shuffle(rest)
+        yield from rest
+
+    def sample_many(self, count: int, length: Optional[int] = None, distinct: bool = False) -> List[str]:
+        """
+        Draw `count` strings. With distinct=True they are drawn without replacement and
+        the result is shorter than count only when the language is smaller than that.
+        """
+        if not distinct:
+            return [self.sample(length) for _ in range(count)]
+        results: List[str] = []
+        for index in self._distinct_indices(self.total(length)):
+            results.append(self.unrank(index, length))
+            if len(results) >= count:
+                break
+        return results
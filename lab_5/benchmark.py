@@ -0,0 +1,59 @@
+"""
+CNF conversion benchmark: grammar size and time per strategy on long nullable productions.
+
+The generated grammar has k nullable nonterminals N1..Nk and the production
+S -> N1 a N2 a ... Nk a, which the classic order expands into 2^k productions before
+binarizing, while the textbook order (BIN before DEL) stays linear in k.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --sizes 4,8,12,16,20 --strategies textbook
+"""
+import argparse
+import time
+
+from grammar_cnf import CNF_STRATEGIES, Grammar
+
+
+def nullable_chain(k: int) -> Grammar:
+    vn = {"S"} | {f"N{i}" for i in range(1, k + 1)}
+    productions = {"S": [tuple(symbol for i in range(1, k + 1) for symbol in (f"N{i}", "a"))]}
+    for i in range(1, k + 1):
+        productions[f"N{i}"] = [("b",), (f"N{i}", "b"), ()]
+    return Grammar(vn, {"a", "b"}, productions, "S")
+
+
+def size(grammar: Grammar) -> int:
+    return sum(len(rhs_list) for rhs_list in grammar.productions.values())
+
+
+def measure(grammar: Grammar, strategy: str, repeat: int):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = grammar.to_cnf(strategy)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    ok, _ = result.validate_cnf()
+    return best, size(result), len(result.vn), ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CNF strategy benchmark")
+    parser.add_argument('--sizes', default='2,4,8,12,16', help="comma-separated counts of nullable symbols")
+    parser.add_argument('--strategies', default=','.join(CNF_STRATEGIES))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"  {'k':>4} {'strategy':<10} {'input P':>8} {'output P':>10} {'V_N':>7} {'ms':>10} {'CNF':>4}")
+    for k in map(int, args.sizes.split(',')):
+        grammar = nullable_chain(k)
+        for strategy in args.strategies.split(','):
+            seconds, productions, nonterminals, ok = measure(grammar, strategy, args.repeat)
+            print(f"  {k:>4} {strategy:<10} {size(grammar):>8} {productions:>10} {nonterminals:>7} "
+                  f"{seconds * 1000:>10.2f} {'ok' if ok else 'FAIL':>4}")
+
+
+if __name__ == '__main__':
+    main()
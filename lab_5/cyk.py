@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from grammar_cnf import Grammar
+
+
+@dataclass
+class ParseTree:
+    symbol: str
+    children: List["ParseTree"] = field(default_factory=list)
+    terminal: Optional[str] = None
+
+    def leaves(self) -> List[str]:
+        out: List[str] = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.terminal is not None:
+                out.append(node.terminal)
+            stack.extend(reversed(node.children))
+        return out
+
+    def __str__(self) -> str:
+        # Bracketed form, e.g. (S (A a) (B b)); built without recursion so deep trees print
+        parts: List[str] = []
+        stack: List[object] = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+                continue
+            if item.terminal is not None:
+                parts.append(f"({item.symbol} {item.terminal})")
+                continue
+            parts.append(f"({item.symbol}")
+            stack.append(")")
+            for child in reversed(item.children):
+                stack.append(child)
+                stack.append(" ")
+        return "".join(parts)
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class CYKParser:
+    """
+    CYK recognizer and parser for a grammar in Chomsky Normal Form.
+
+    Nonterminals are interned to bit positions and every chart cell is an int bitmask of
+    the nonterminals deriving that span. Combining two cells goes through a memoized
+    (left mask, right mask) -> head mask table, so each distinct pair of cells is worked
+    out once. For every position the parser also keeps bitsets of span ends (and starts)
+    whose cells are non-empty; ANDing them gives exactly the split points worth trying,
+    so empty parts of the chart cost nothing.
+    """
+
+    def __init__(self, grammar: Grammar, max_pairs: int = 1 << 16):
+        ok, issues = grammar.validate_cnf()
+        if not ok:
+            raise ValueError("Grammar is not in CNF: " + "; ".join(issues))
+        self.grammar = grammar
+        self.symbols: List[str] = sorted(grammar.vn)
+        self.index: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.start_bit = 1 << self.index[grammar.start]
+        self.accepts_empty = () in grammar.productions.get(grammar.start, ())
+
+        self.terminal_masks: Dict[str, int] = {}
+        # pairs[B][C] = mask of heads A with A -> B C
+        self.pairs: List[Dict[int, int]] = [{} for _ in self.symbols]
+        self.rules: List[List[Tuple[int, int]]] = [[] for _ in self.symbols]
+        for head, rhs_list in grammar.productions.items():
+            head_index = self.index[head]
+            for rhs in rhs_list:
+                if len(rhs) == 1:
+                    self.terminal_masks[rhs[0]] = self.terminal_masks.get(rhs[0], 0) | 1 << head_index
+                elif len(rhs) == 2:
+                    left, right = self.index[rhs[0]], self.index[rhs[1]]
+                    self.pairs[left][right] = self.pairs[left].get(right, 0) | 1 << head_index
+                    self.rules[head_index].append((left, right))
+        # Symbols that occur as a left / right child, and the right children of each left one
+        self.left_mask = 0
+        self.right_mask = 0
+        self.right_of: List[int] = [0] * len(self.symbols)
+        for left, rights in enumerate(self.pairs):
+            for right in rights:
+                self.left_mask |= 1 << left
+                self.right_mask |= 1 << right
+                self.right_of[left] |= 1 << right
+
+        self.max_pairs = max_pairs
+        self._pair_table: Dict[Tuple[int, int], int] = {}
+
+    def combine(self, left: int, right: int) -> int:
+        # Heads A with A -> B C for some B in left and C in right
+        key = (left, right)
+        heads = self._pair_table.get(key)
+        if heads is not None:
+            return heads
+        heads = 0
+        for b in _bits(left & self.left_mask):
+            matches = right & self.right_of[b]
+            if matches:
+                rights = self.pairs[b]
+                for c in _bits(matches):
+                    heads |= rights[c]
+        if len(self._pair_table) >= self.max_pairs:
+            self._pair_table.clear()
+        self._pair_table[key] = heads
+        return heads
+
+    def chart(self, tokens: Sequence[str]) -> Optional[List[List[int]]]:
+        """
+        chart[i][length - 1] is the mask of nonterminals deriving tokens[i:i + length].
+        Returns None as soon as some token has no terminal production.
+        """
+        n = len(tokens)
+        chart: List[List[int]] = []
+        left_ends = [0] * (n + 1)      # bit k set: chart cell (i, k) holds a left child
+        right_starts = [0] * (n + 1)   # bit k set: chart cell (k, j) holds a right child
+        for i, token in enumerate(tokens):
+            mask = self.terminal_masks.get(token, 0)
+            if not mask:
+                return None
+            row = [0] * (n - i)
+            row[0] = mask
+            chart.append(row)
+            if mask & self.left_mask:
+                left_ends[i] |= 1 << (i + 1)
+            if mask & self.right_mask:
+                right_starts[i + 1] |= 1 << i
+
+        for length in range(2, n + 1):
+            for i in range(n - length + 1):
+                j = i + length
+                # Split points k with a left child in (i, k) and a right child in (k, j)
+                splits = left_ends[i] & right_starts[j]
+                mask = 0
+                for k in _bits(splits):
+                    mask |= self.combine(chart[i][k - i - 1], chart[k][j - k - 1])
+                if mask:
+                    chart[i][length - 1] = mask
+                    if mask & self.left_mask:
+                        left_ends[i] |= 1 << j
+                    if mask & self.right_mask:
+                        right_starts[j] |= 1 << i
+        return chart
+
+    def recognize(self, tokens: Sequence[str]) -> bool:
+        if not tokens:
+            return self.accepts_empty
+        chart = self.chart(tokens)
+        return chart is not None and bool(chart[0][len(tokens) - 1] & self.start_bit)
+
+    def parse(self, tokens: Sequence[str]) -> Optional[ParseTree]:
+        # One parse tree (leftmost split first), or None when tokens are not in the language
+        if not tokens:
+            return ParseTree(self.grammar.start, terminal="") if self.accepts_empty else None
+        chart = self.chart(tokens)
+        n = len(tokens)
+        if chart is None or not chart[0][n - 1] & self.start_bit:
+            return None
+
+        root = ParseTree(self.grammar.start)
+        stack = [(root, self.index[self.grammar.start], 0, n)]
+        while stack:
+            node, symbol, i, j = stack.pop()
+            if j - i == 1:
+                node.terminal = tokens[i]
+                continue
+            left, right, k = self._split(chart, symbol, i, j)
+            left_node, right_node = ParseTree(self.symbols[left]), ParseTree(self.symbols[right])
+            node.children = [left_node, right_node]
+            stack.append((right_node, right, k, j))
+            stack.append((left_node, left, i, k))
+        return root
+
+    def _split(self, chart: List[List[int]], symbol: int, i: int, j: int) -> Tuple[int, int, int]:
+        for k in range(i + 1, j):
+            left_cell, right_cell = chart[i][k - i - 1], chart[k][j - k - 1]
+            if not left_cell or not right_cell:
+                continue
+            for left, right in self.rules[symbol]:
+                if left_cell >> left & 1 and right_cell >> right & 1:
+                    return left, right, k
+        raise ValueError(f"No derivation of {self.symbols[symbol]} over [{i}, {j})")
+
+
+def cyk(grammar: Grammar, tokens: Sequence[str]) -> bool:
+    return CYKParser(grammar).recognize(tokens)
@@ -0,0 +1,76 @@
+"""
+CYK scaling benchmark: recognition time by input length and worker count.
+
+The grammar is balanced parentheses in CNF and the input repeats (()()), so spans of
+every length hold derivable cells and the chart is far from empty. Each parallel run
+checks its answer against the sequential CYKParser.
+
+Usage:
+    python cyk_benchmark.py
+    python cyk_benchmark.py --lengths 2000,8000,20000 --workers 1,4,8,16 --no-sequential
+"""
+import argparse
+import os
+import time
+from contextlib import ExitStack
+
+from cyk import CYKParser
+from grammar_cnf import Grammar
+from parallel_cyk import ParallelCYKParser
+
+
+def balanced_parentheses() -> Grammar:
+    # S -> S S | ( S ) | ( )
+    productions = {
+        "S": [("S", "S"), ("L", "P"), ("L", "R")],
+        "P": [("S", "R")],
+        "L": [("(",)],
+        "R": [(")",)],
+    }
+    return Grammar({"S", "P", "L", "R"}, {"(", ")"}, productions, "S")
+
+
+def nested_word(length: int) -> str:
+    return ("(()())" * (length // 6 + 1))[:length]
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Wavefront-parallel CYK scaling benchmark")
+    parser.add_argument('--lengths', default='500,1000,2000,4000', help="comma-separated input lengths")
+    parser.add_argument('--workers', default=','.join(str(count) for count in sorted({1, 2, 4, cpus})),
+                        help="comma-separated worker counts")
+    parser.add_argument('--no-sequential', action='store_true', help="skip timing CYKParser (slow on long inputs)")
+    args = parser.parse_args()
+
+    grammar = balanced_parentheses()
+    counts = [int(count) for count in args.workers.split(',')]
+    print(f"  cpus: {cpus}")
+    columns = ([] if args.no_sequential else ['sequential']) + [f"{count} workers" for count in counts]
+    print(f"  {'n':>7}" + "".join(f"{column:>13}" for column in columns) + f"{'speedup':>9}")
+
+    with ExitStack() as stack:
+        parsers = [stack.enter_context(ParallelCYKParser(grammar, count)) for count in counts]
+        for cyk in parsers:
+            cyk.recognize(nested_word(60))
+        for n in map(int, args.lengths.split(',')):
+            word = nested_word(n)
+            row = f"  {n:>7}"
+            expected = None
+            if not args.no_sequential:
+                started = time.perf_counter()
+                expected = CYKParser(grammar).recognize(word)
+                row += f"{time.perf_counter() - started:>13.3f}"
+            timings = []
+            for count, cyk in zip(counts, parsers):
+                started = time.perf_counter()
+                accepted = cyk.recognize(word)
+                timings.append(time.perf_counter() - started)
+                if expected is not None and accepted != expected:
+                    raise SystemExit(f"n={n}, {count} workers: result differs from CYKParser")
+                row += f"{timings[-1]:>13.3f}"
+            print(row + f"{timings[0] / timings[-1]:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
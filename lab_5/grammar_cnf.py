@@ -1,10 +1,26 @@
 from __future__ import annotations
 
+from collections import defaultdict, deque
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Set, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 
 EPSILON = "eps"
+CNF_STRATEGIES = ("classic", "textbook")
+# Stage names used by normalize(), in the order each strategy runs them
+PIPELINES = {
+    "classic": ("DEL", "UNIT", "NONPRODUCTIVE", "INACCESSIBLE", "TERM", "BIN"),
+    "textbook": ("START", "TERM", "BIN", "DEL", "UNIT", "NONPRODUCTIVE", "INACCESSIBLE"),
+}
+_STAGES = {
+    "START": "_add_start_symbol",
+    "TERM": "_separate_terminals",
+    "BIN": "_binarize",
+    "DEL": "_eliminate_epsilon",
+    "UNIT": "_eliminate_unit",
+    "INACCESSIBLE": "_eliminate_inaccessible",
+    "NONPRODUCTIVE": "_eliminate_nonproductive",
+}
 
 
 def parse_rhs(text: str) -> Tuple[str, ...]:
@@ -16,18 +32,68 @@ def parse_rhs(text: str) -> Tuple[str, ...]:
     return tuple(stripped)
 
 
+class Alternatives:
+    """
+    Right-hand sides of one nonterminal: a set that remembers insertion order.
+
+    Backed by a dict, so membership and add() are O(1) and iteration (and therefore
+    printing) follows the order in which productions were first added.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: Iterable[Tuple[str, ...]] = ()):
+        self._items: Dict[Tuple[str, ...], None] = dict.fromkeys(items)
+
+    def add(self, rhs: Tuple[str, ...]) -> bool:
+        # Returns False when rhs was already present
+        if rhs in self._items:
+            return False
+        self._items[rhs] = None
+        return True
+
+    def discard(self, rhs: Tuple[str, ...]) -> None:
+        self._items.pop(rhs, None)
+
+    def copy(self) -> "Alternatives":
+        return Alternatives(self._items)
+
+    def __contains__(self, rhs: object) -> bool:
+        return rhs in self._items
+
+    def __iter__(self) -> Iterator[Tuple[str, ...]]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Alternatives):
+            return list(self._items) == list(other._items)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Alternatives({list(self._items)!r})"
+
+
 @dataclass
 class Grammar:
     vn: Set[str]
     vt: Set[str]
-    productions: Dict[str, List[Tuple[str, ...]]]
+    productions: Dict[str, Alternatives]
     start: str
 
+    def __post_init__(self) -> None:
+        # Accept plain lists of right-hand sides; duplicates collapse, first occurrence wins
+        for head, rhs_list in self.productions.items():
+            if not isinstance(rhs_list, Alternatives):
+                self.productions[head] = Alternatives(rhs_list)
+
     def copy(self) -> "Grammar":
         return Grammar(
             set(self.vn),
             set(self.vt),
-            {k: list(v) for k, v in self.productions.items()},
+            {k: v.copy() for k, v in self.productions.items()},
             self.start,
         )
 
@@ -48,172 +114,294 @@ class Grammar:
             return EPSILON
         return "".join(rhs)
 
-    def eliminate_epsilon(self) -> "Grammar":
-        grammar = self.copy()
-        nullable = set()
-        changed = True
-
-        while changed:
-            changed = False
-            for head, rhs_list in grammar.productions.items():
-                if head in nullable:
-                    continue
-                for rhs in rhs_list:
-                    if not rhs:
-                        nullable.add(head)
-                        changed = True
-                        break
-                    if all(symbol in nullable for symbol in rhs):
-                        nullable.add(head)
-                        changed = True
-                        break
-
-        new_productions: Dict[str, List[Tuple[str, ...]]] = {k: [] for k in grammar.vn}
+    def nullable_symbols(self) -> Set[str]:
+        # Nonterminals that derive the empty string
+        return _saturate(self.productions, lambda symbol: False)
+
+    def productive_symbols(self) -> Set[str]:
+        # Nonterminals that derive some terminal string
+        return _saturate(self.productions, lambda symbol: symbol in self.vt)
+
+    def reachable_symbols(self) -> Set[str]:
+        # Nonterminals that appear in some sentential form derived from the start symbol
+        reachable = set([self.start])
+        queue = deque([self.start])
+        while queue:
+            head = queue.popleft()
+            for rhs in self.productions.get(head, ()):
+                for symbol in rhs:
+                    if symbol in self.vn and symbol not in reachable:
+                        reachable.add(symbol)
+                        queue.append(symbol)
+        return reachable
+
+    def _working_copy(self) -> "Grammar":
+        # New V_N, V_T and production dict; the Alternatives are still this grammar's.
+        # Stages never modify an Alternatives they did not create, they replace it, so the
+        # input is left intact while the working copy is normalized.
+        return Grammar(set(self.vn), set(self.vt), dict(self.productions), self.start)
+
+    def _apply(self, *stages: str, on_stage: Optional[Callable[[str, "Grammar"], None]] = None) -> "Grammar":
+        grammar = self._working_copy()
+        for stage in stages:
+            getattr(grammar, _STAGES[stage])()
+            if on_stage is not None:
+                on_stage(stage, grammar)
+        # Copy whatever no stage replaced, so the result never shares an Alternatives with self
+        inherited = {id(rhs_list) for rhs_list in self.productions.values()}
         for head, rhs_list in grammar.productions.items():
-            for rhs in rhs_list:
-                if not rhs:
-                    continue
-                options = _nullable_expansions(rhs, nullable)
-                for option in options:
-                    if option or head == grammar.start:
-                        if option not in new_productions[head]:
-                            new_productions[head].append(option)
-
-        if grammar.start in nullable and tuple() not in new_productions[grammar.start]:
-            new_productions[grammar.start].append(tuple())
-
-        grammar.productions = new_productions
+            if id(rhs_list) in inherited:
+                grammar.productions[head] = rhs_list.copy()
         return grammar
 
+    def eliminate_epsilon(self) -> "Grammar":
+        return self._apply("DEL")
+
     def eliminate_unit(self) -> "Grammar":
-        grammar = self.copy()
-        unit_closure = {nt: _unit_closure(nt, grammar.productions, grammar.vn) for nt in grammar.vn}
-
-        new_productions: Dict[str, List[Tuple[str, ...]]] = {k: [] for k in grammar.vn}
-        for head in grammar.vn:
-            for target in unit_closure[head]:
-                for rhs in grammar.productions.get(target, []):
-                    if len(rhs) == 1 and rhs[0] in grammar.vn:
-                        continue
-                    if rhs not in new_productions[head]:
-                        new_productions[head].append(rhs)
-
-        grammar.productions = new_productions
-        return grammar
+        return self._apply("UNIT")
 
     def eliminate_inaccessible(self) -> "Grammar":
-        grammar = self.copy()
-        reachable = set([grammar.start])
-        changed = True
-
-        while changed:
-            changed = False
-            for head in list(reachable):
-                for rhs in grammar.productions.get(head, []):
-                    for symbol in rhs:
-                        if symbol in grammar.vn and symbol not in reachable:
-                            reachable.add(symbol)
-                            changed = True
-
-        grammar.vn = reachable
-        grammar.productions = {k: v for k, v in grammar.productions.items() if k in reachable}
-        return grammar
+        return self._apply("INACCESSIBLE")
 
     def eliminate_nonproductive(self) -> "Grammar":
-        grammar = self.copy()
-        productive: Set[str] = set()
-        changed = True
-
-        while changed:
-            changed = False
-            for head, rhs_list in grammar.productions.items():
-                if head in productive:
+        return self._apply("NONPRODUCTIVE")
+
+    def add_start_symbol(self) -> "Grammar":
+        return self._apply("START")
+
+    def separate_terminals(self) -> "Grammar":
+        return self._apply("TERM")
+
+    def binarize(self) -> "Grammar":
+        return self._apply("BIN")
+
+    def remove_useless(self) -> "Grammar":
+        # Nonproductive symbols first: removing them can make more symbols inaccessible
+        return self._apply("NONPRODUCTIVE", "INACCESSIBLE")
+
+    def to_cnf(self, strategy: Optional[str] = None) -> "Grammar":
+        """
+        Convert to Chomsky Normal Form.
+
+        strategy=None only runs TERM and BIN; the grammar must already be free of
+        epsilon and unit productions (the step-by-step flow).
+        "classic": DEL, UNIT, useless symbols, then TERM and BIN. DEL sees the original
+        right-hand sides, so one with k nullable symbols expands into up to 2^k productions.
+        "textbook": START, TERM, BIN, DEL, UNIT, useless symbols. After BIN no
+        right-hand side is longer than two, so DEL adds at most two variants per production
+        and the result stays polynomial in the size of the grammar.
+        """
+        if strategy is None:
+            return self._apply("TERM", "BIN")
+        return self.normalize(strategy)
+
+    def normalize(self, strategy: str = "classic",
+                  on_stage: Optional[Callable[[str, "Grammar"], None]] = None) -> "Grammar":
+        """
+        Run every stage of a CNF strategy (see to_cnf) on one working grammar.
+
+        Each stage rewrites the working grammar in place, replacing only the Alternatives it
+        changes, so no stage copies the whole grammar. The result is independent of this
+        grammar. on_stage(name, grammar) is called after each stage with a name from
+        PIPELINES[strategy] and the working grammar itself, which may still share
+        Alternatives with this one: treat it as read-only and call copy() on it to keep an
+        intermediate stage.
+        """
+        if strategy not in PIPELINES:
+            raise ValueError(f"Unknown CNF strategy: {strategy!r} (expected one of {CNF_STRATEGIES})")
+        return self._apply(*PIPELINES[strategy], on_stage=on_stage)
+
+    # In-place stages behind normalize() and the stage methods above
+
+    def _eliminate_epsilon(self) -> None:
+        nullable = self.nullable_symbols()
+
+        productions: Dict[str, Alternatives] = {k: Alternatives() for k in sorted(self.vn)}
+        for head, rhs_list in self.productions.items():
+            expanded = Alternatives()
+            for rhs in rhs_list:
+                if not rhs:
                     continue
-                for rhs in rhs_list:
-                    if all((symbol in grammar.vt) or (symbol in productive) for symbol in rhs):
-                        productive.add(head)
-                        changed = True
-                        break
-
-        grammar.vn = grammar.vn.intersection(productive)
-        new_productions: Dict[str, List[Tuple[str, ...]]] = {}
-        for head in grammar.vn:
-            filtered = []
-            for rhs in grammar.productions.get(head, []):
-                if all((symbol in grammar.vt) or (symbol in grammar.vn) for symbol in rhs):
-                    filtered.append(rhs)
-            new_productions[head] = filtered
-
-        grammar.productions = new_productions
-        return grammar
+                for option in _nullable_expansions(rhs, nullable):
+                    if option or head == self.start:
+                        expanded.add(option)
+            productions[head] = expanded
+
+        if self.start in nullable:
+            productions[self.start].add(tuple())
+
+        self.productions = productions
+
+    def _eliminate_unit(self) -> None:
+        """
+        Every head gets the non-unit productions of all nonterminals it reaches through
+        unit productions. The unit graph is condensed into strongly connected components;
+        all members of a component reach the same symbols, so they share one closure and
+        the productions are built once per component (each member head gets its own
+        copy). Components come out of Tarjan's algorithm successors first, so
+        each closure bitset (bit c: component c is reachable) is the OR of its
+        successors' finished closures, and each component's own non-unit productions are
+        collected once and copied into the components that reach it.
+        """
+        graph = {head: [rhs[0] for rhs in self.productions.get(head, ()) if len(rhs) == 1 and rhs[0] in self.vn]
+                 for head in sorted(self.vn)}
+        components = _strongly_connected(graph)
+        component_of = {member: index for index, members in enumerate(components) for member in members}
+
+        closures: List[int] = []
+        own: List[Alternatives] = []
+        has_epsilon = 0
+        expanded: List[Alternatives] = []
+        for index, members in enumerate(components):
+            closure = 1 << index
+            rules = Alternatives()
+            for member in members:
+                for target in graph[member]:
+                    reached = component_of[target]
+                    if reached != index:
+                        closure |= closures[reached]
+                for rhs in self.productions.get(member, ()):
+                    if not rhs:
+                        has_epsilon |= 1 << index
+                    elif not (len(rhs) == 1 and rhs[0] in self.vn):
+                        rules.add(rhs)
+            closures.append(closure)
+            own.append(rules)
+
+            if closure == 1 << index:
+                expanded.append(rules)
+                continue
+            merged = rules.copy()
+            # Nearest components first: higher indices are closer in topological order
+            for reached in sorted(_bits(closure ^ 1 << index), reverse=True):
+                for rhs in own[reached]:
+                    merged.add(rhs)
+            expanded.append(merged)
+
+        # The first member of a component takes its Alternatives, the others get copies
+        productions: Dict[str, Alternatives] = {}
+        claimed = set()
+        for head in sorted(self.vn):
+            index = component_of[head]
+            productions[head] = expanded[index].copy() if index in claimed else expanded[index]
+            claimed.add(index)
+        # Only the start symbol may keep an epsilon production
+        if self.start in component_of and closures[component_of[self.start]] & has_epsilon:
+            start_rules = Alternatives(rhs for rhs in self.productions.get(self.start, ())
+                                       if not (len(rhs) == 1 and rhs[0] in self.vn))
+            for rhs in productions[self.start]:
+                start_rules.add(rhs)
+            start_rules.add(tuple())
+            productions[self.start] = start_rules
+
+        self.productions = productions
+
+    def _eliminate_inaccessible(self) -> None:
+        reachable = self.reachable_symbols()
+
+        self.vn = reachable
+        self.productions = {k: v for k, v in self.productions.items() if k in reachable}
+
+    def _eliminate_nonproductive(self) -> None:
+        productive = self.productive_symbols()
+
+        self.vn &= productive
+        symbols = self.vn | self.vt
+        productions: Dict[str, Alternatives] = {}
+        for head in sorted(self.vn):
+            rhs_list = self.productions.get(head, Alternatives())
+            if all(symbol in symbols for rhs in rhs_list for symbol in rhs):
+                productions[head] = rhs_list
+            else:
+                productions[head] = Alternatives(rhs for rhs in rhs_list if all(symbol in symbols for symbol in rhs))
+
+        self.productions = productions
+
+    def _add_start_symbol(self) -> None:
+        # START: when the start symbol occurs on a right-hand side, add S0 -> S and start from S0
+        if not any(self.start in rhs for rhs_list in self.productions.values() for rhs in rhs_list):
+            return
+        name = _fresh_nonterminal(f"{self.start}0", self.vn)
+        self.vn.add(name)
+        self.productions[name] = Alternatives([(self.start,)])
+        self.start = name
 
-    def to_cnf(self) -> "Grammar":
-        grammar = self.copy()
-        original_productions = {k: list(v) for k, v in grammar.productions.items()}
+    def _separate_terminals(self) -> None:
+        # TERM: terminals inside right-hand sides of length >= 2 get their own T_a -> a
         mapping: Dict[str, str] = {}
-        new_productions: Dict[str, List[Tuple[str, ...]]] = {k: [] for k in grammar.vn}
+        heads = list(self.productions)
+        productions: Dict[str, Alternatives] = {k: self.productions.get(k, Alternatives()) for k in sorted(self.vn)}
+        for head in heads:
+            productions.setdefault(head, self.productions[head])
 
         def get_terminal_symbol(term: str) -> str:
             if term not in mapping:
-                name = _fresh_nonterminal(f"T_{term}", grammar.vn)
-                grammar.vn.add(name)
-                new_productions[name] = [(term,)]
+                name = _fresh_nonterminal(f"T_{term}", self.vn)
+                self.vn.add(name)
+                productions[name] = Alternatives([(term,)])
                 mapping[term] = name
             return mapping[term]
 
-        for head, rhs_list in original_productions.items():
+        for head in heads:
+            rhs_list = productions[head]
+            if all(len(rhs) <= 1 for rhs in rhs_list):
+                continue
+            replaced_list = Alternatives()
             for rhs in rhs_list:
                 if len(rhs) <= 1:
-                    new_productions.setdefault(head, []).append(rhs)
+                    replaced_list.add(rhs)
                     continue
                 replaced = []
                 for symbol in rhs:
-                    if symbol in grammar.vt:
+                    if symbol in self.vt:
                         replaced.append(get_terminal_symbol(symbol))
                     else:
                         replaced.append(symbol)
-                new_productions.setdefault(head, []).append(tuple(replaced))
+                replaced_list.add(tuple(replaced))
+            productions[head] = replaced_list
+
+        self.productions = productions
 
-        final_productions: Dict[str, List[Tuple[str, ...]]] = {k: [] for k in grammar.vn}
+    def _binarize(self) -> None:
+        # BIN: A -> B1 B2 ... Bk becomes a chain A -> B1 X, X -> B2 X1, ..., the last pair shared
+        heads = list(self.productions)
+        productions: Dict[str, Alternatives] = {k: self.productions.get(k, Alternatives()) for k in sorted(self.vn)}
+        for head in heads:
+            productions.setdefault(head, self.productions[head])
         pair_map: Dict[Tuple[str, str], str] = {}
+        fresh = _fresh_names("X", self.vn)
+
+        def new_symbol() -> str:
+            name = next(fresh)
+            self.vn.add(name)
+            return name
 
         def get_pair_symbol(pair: Tuple[str, str]) -> str:
             if pair in pair_map:
                 return pair_map[pair]
-            name = _fresh_nonterminal("X", grammar.vn)
-            grammar.vn.add(name)
+            name = new_symbol()
             pair_map[pair] = name
-            final_productions.setdefault(name, [])
-            if pair not in final_productions[name]:
-                final_productions[name].append(pair)
+            productions.setdefault(name, Alternatives()).add(pair)
             return name
-        for head, rhs_list in list(new_productions.items()):
+
+        for head in heads:
+            rhs_list = productions[head]
+            if all(len(rhs) <= 2 for rhs in rhs_list):
+                continue
+            productions[head] = Alternatives()
             for rhs in rhs_list:
                 if len(rhs) <= 2:
-                    if rhs not in final_productions.get(head, []):
-                        final_productions.setdefault(head, []).append(rhs)
+                    productions[head].add(rhs)
                     continue
                 current_head = head
-                symbols = list(rhs)
-                while len(symbols) > 2:
-                    first = symbols.pop(0)
-                    if len(symbols) == 2:
-                        pair_nt = get_pair_symbol((symbols[0], symbols[1]))
-                        final_productions.setdefault(current_head, [])
-                        final_productions[current_head].append((first, pair_nt))
-                        symbols = []
-                        break
-                    new_head = _fresh_nonterminal("X", grammar.vn)
-                    grammar.vn.add(new_head)
-                    final_productions.setdefault(current_head, [])
-                    final_productions[current_head].append((first, new_head))
+                for index in range(len(rhs) - 3):
+                    new_head = new_symbol()
+                    productions.setdefault(current_head, Alternatives()).add((rhs[index], new_head))
                     current_head = new_head
-                if len(symbols) == 2:
-                    final_productions.setdefault(current_head, [])
-                    final_productions[current_head].append(tuple(symbols))
+                pair_nt = get_pair_symbol((rhs[-2], rhs[-1]))
+                productions.setdefault(current_head, Alternatives()).add((rhs[-3], pair_nt))
 
-        grammar.productions = final_productions
-        return grammar
+        self.productions = productions
 
     def validate_cnf(self) -> Tuple[bool, List[str]]:
         issues: List[str] = []
@@ -245,34 +433,129 @@ class Grammar:
         return len(issues) == 0, issues
 
 
-def _nullable_expansions(rhs: Tuple[str, ...], nullable: Set[str]) -> Set[Tuple[str, ...]]:
-    results: Set[Tuple[str, ...]] = set()
+def _saturate(productions: Dict[str, Alternatives], given: Callable[[str], bool]) -> Set[str]:
+    """
+    Least set of heads H such that some production head -> rhs has every rhs symbol
+    either given(symbol) or in H. Used for nullable (nothing given) and productive
+    (terminals given) symbols.
+
+    Each production keeps a counter of rhs occurrences not yet satisfied, and an index
+    maps every symbol to the productions that mention it. Adding a symbol to H only
+    touches those productions, so the whole analysis is linear in the grammar size
+    instead of rescanning every production until nothing changes.
+    """
+    heads: List[str] = []
+    pending: List[int] = []
+    occurrences: Dict[str, List[int]] = defaultdict(list)
+    found: Set[str] = set()
+    queue: deque = deque()
+    for head, rhs_list in productions.items():
+        for rhs in rhs_list:
+            index = len(heads)
+            heads.append(head)
+            count = 0
+            for symbol in rhs:
+                if not given(symbol):
+                    # One entry per occurrence, so A -> BB waits for B only once but counts twice
+                    occurrences[symbol].append(index)
+                    count += 1
+            pending.append(count)
+            if count == 0 and head not in found:
+                found.add(head)
+                queue.append(head)
+
+    while queue:
+        symbol = queue.popleft()
+        for index in occurrences.get(symbol, ()):
+            pending[index] -= 1
+            head = heads[index]
+            if pending[index] == 0 and head not in found:
+                found.add(head)
+                queue.append(head)
+    return found
+
+
+def _nullable_expansions(rhs: Tuple[str, ...], nullable: Set[str]) -> Alternatives:
+    # Every way of dropping nullable symbols, starting with rhs itself
+    results = Alternatives()
 
     def backtrack(index: int, current: List[str]) -> None:
         if index == len(rhs):
             results.add(tuple(current))
             return
         symbol = rhs[index]
-        if symbol in nullable:
-            backtrack(index + 1, current)
         current.append(symbol)
         backtrack(index + 1, current)
         current.pop()
+        if symbol in nullable:
+            backtrack(index + 1, current)
 
     backtrack(0, [])
     return results
 
 
-def _unit_closure(start: str, productions: Dict[str, List[Tuple[str, ...]]], vn: Set[str]) -> Set[str]:
-    closure = set([start])
-    stack = [start]
-    while stack:
-        head = stack.pop()
-        for rhs in productions.get(head, []):
-            if len(rhs) == 1 and rhs[0] in vn and rhs[0] not in closure:
-                closure.add(rhs[0])
-                stack.append(rhs[0])
-    return closure
+def _strongly_connected(graph: Dict[str, List[str]]) -> List[List[str]]:
+    """
+    Tarjan's strongly connected components, without recursion so long unit chains do
+    not hit the recursion limit. Components are listed in reverse topological order:
+    every edge leaving a component points into one listed before it.
+    """
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    components: List[List[str]] = []
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph[root]))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = low[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph[successor])))
+                    break
+                if successor in on_stack:
+                    low[node] = min(low[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        members.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(members))
+    return components
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _fresh_names(prefix: str, vn: Set[str]) -> Iterator[str]:
+    # Same names as repeated _fresh_nonterminal calls while vn only grows, without
+    # rescanning prefix1, prefix2, ... for every new symbol
+    idx = 0
+    while True:
+        name = prefix if idx == 0 else f"{prefix}{idx}"
+        idx += 1
+        if name not in vn:
+            yield name
 
 
 def _fresh_nonterminal(prefix: str, vn: Set[str]) -> str:
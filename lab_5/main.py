@@ -1,4 +1,7 @@
-from grammar_cnf import EPSILON, Grammar, parse_rhs
+import argparse
+
+from cyk import CYKParser
+from grammar_cnf import CNF_STRATEGIES, EPSILON, Grammar, parse_rhs
 
 
 def build_productions(raw):
@@ -8,7 +11,48 @@ def build_productions(raw):
     return productions
 
 
+def print_stage(title: str, grammar: Grammar) -> None:
+    print(f"\n{title}")
+    print(grammar)
+
+
+# Stages printed for each strategy; the last one shown is the finished CNF grammar
+STAGE_TITLES = {
+    "classic": {
+        "DEL": "After eliminating epsilon productions",
+        "UNIT": "After eliminating renaming (unit productions)",
+        "NONPRODUCTIVE": "After eliminating nonproductive symbols",
+        "INACCESSIBLE": "After eliminating inaccessible symbols",
+        "BIN": "Chomsky Normal Form",
+    },
+    "textbook": {
+        "START": "START: new start symbol",
+        "TERM": "TERM: terminals in long right-hand sides replaced",
+        "BIN": "BIN: right-hand sides split into pairs",
+        "DEL": "DEL: epsilon productions eliminated",
+        "UNIT": "UNIT: unit productions eliminated",
+        "INACCESSIBLE": "Chomsky Normal Form",
+    },
+}
+
+
+def normalize(grammar: Grammar, strategy: str) -> Grammar:
+    # Stages are printed as they finish, so no intermediate grammar is kept around
+    titles = STAGE_TITLES[strategy]
+
+    def report(stage: str, current: Grammar) -> None:
+        if stage in titles:
+            print_stage(titles[stage], current)
+
+    return grammar.normalize(strategy, report)
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert the variant grammar to Chomsky Normal Form")
+    parser.add_argument("--strategy", choices=CNF_STRATEGIES, default="classic",
+                        help="classic: DEL/UNIT first; textbook: START, TERM, BIN, DEL, UNIT")
+    args = parser.parse_args()
+
     print("Lab 5: Chomsky Normal Form")
     print("Variant 20")
 
@@ -25,28 +69,9 @@ def main() -> None:
 
     grammar = Grammar(vn, vt, build_productions(raw_productions), "S")
 
-    print("\nOriginal Grammar")
-    print(grammar)
-
-    no_eps = grammar.eliminate_epsilon()
-    print("\nAfter eliminating epsilon productions")
-    print(no_eps)
-
-    no_unit = no_eps.eliminate_unit()
-    print("\nAfter eliminating renaming (unit productions)")
-    print(no_unit)
-
-    no_inacc = no_unit.eliminate_inaccessible()
-    print("\nAfter eliminating inaccessible symbols")
-    print(no_inacc)
+    print_stage("Original Grammar", grammar)
 
-    no_nonprod = no_inacc.eliminate_nonproductive()
-    print("\nAfter eliminating nonproductive symbols")
-    print(no_nonprod)
-
-    cnf = no_nonprod.to_cnf()
-    print("\nChomsky Normal Form")
-    print(cnf)
+    cnf = normalize(grammar, args.strategy)
 
     ok, issues = cnf.validate_cnf()
     print("\nCNF validation")
@@ -56,6 +81,21 @@ def main() -> None:
         print("CNF check failed:")
         for issue in issues:
             print(f"  - {issue}")
+        return
+
+    print_membership(cnf, ["", "b", "ab", "ba", "aab", "bab", "abba", "bbbaa"])
+
+
+def print_membership(grammar: Grammar, words) -> None:
+    parser = CYKParser(grammar)
+    print("\nCYK membership")
+    for word in words:
+        tree = parser.parse(word)
+        shown = word or EPSILON
+        if tree is None:
+            print(f"  {shown:<8} rejected")
+        else:
+            print(f"  {shown:<8} accepted  {tree}")
 
 
 if __name__ == "__main__":
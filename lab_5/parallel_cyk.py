@@ -0,0 +1,331 @@
+"""
+Wavefront-parallel CYK for long inputs.
+
+Every cell on one anti-diagonal of the CYK chart (one span length) depends only on
+shorter spans, so a whole diagonal can be split into chunks filled by a process pool,
+with a barrier between diagonals. The chart lives in one shared memory block:
+
+    cells         chart cell (i, length) at offsets[i] + length - 1, one unsigned int
+                  per cell holding the mask of nonterminals (up to 64 of them)
+    left_ends     row i, bit k: cell (i, k) holds some left child of a binary rule
+    right_starts  row j, bit k: cell (k, j) holds some right child
+
+These are the same split-point bitsets the sequential CYKParser keeps. A cell (i, j) is
+the only writer of left_ends[i] and right_starts[j] on its diagonal and reads no other
+cell of that diagonal, so workers never touch the same bytes. Within a chunk the split
+rows are ANDed bytewise with numpy, only non-zero bytes are unpacked into split points,
+and the (left, right) cell pairs are turned into head masks with a full lookup table
+(at most 8 nonterminals) or the parser's memoized pair combination.
+
+Short diagonals (little work) are filled in the calling process; pool dispatch only
+pays off once a diagonal has enough split points to check. Workers stay attached to
+the chart for the whole input and detach once the caller signals that it is done.
+
+See cyk_benchmark.py for timings by worker count and input length.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from cyk import CYKParser
+from grammar_cnf import Grammar
+
+MAX_SYMBOLS = 64
+# Split points (cells x length) handled per numpy batch, bounds temporary memory
+BATCH_WORK = 1 << 22
+
+
+def _cell_dtype(count: int) -> Optional[np.dtype]:
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if count <= np.dtype(dtype).itemsize * 8:
+            return np.dtype(dtype)
+    return None
+
+
+class _Chart:
+    # Views over one shared memory block; created by the caller, attached to by workers
+
+    def __init__(self, n: int, dtype: np.dtype, name: Optional[str] = None):
+        self.n = n
+        self.dtype = dtype
+        self.width = n // 8 + 1
+        cells = n * (n + 1) // 2
+        table = cells * dtype.itemsize
+        bitsets = (n + 1) * self.width
+        if name is None:
+            # One spare row after right_starts so byte windows never run off the block
+            self.shm = shared_memory.SharedMemory(create=True, size=table + 2 * bitsets + self.width)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.owner = name is None
+        self.name = self.shm.name
+        buffer = self.shm.buf
+        self.cells = np.ndarray((cells,), dtype, buffer)
+        self.left_ends = np.ndarray((n + 1, self.width), np.uint8, buffer, offset=table)
+        self.right_starts = np.ndarray((n + 1, self.width), np.uint8, buffer, offset=table + bitsets)
+        rows = np.arange(n + 1, dtype=np.int64)
+        self.offsets = rows * n - rows * (rows - 1) // 2
+
+    def windows(self, bitsets: np.ndarray, span: int) -> np.ndarray:
+        # windows[p] is the `span` bytes from flat position p of the bitset rows
+        return np.lib.stride_tricks.as_strided(bitsets, (bitsets.size, span), (1, 1), writeable=False)
+
+    def cell(self, i: int, length: int) -> int:
+        return int(self.cells[self.offsets[i] + length - 1])
+
+    def close(self) -> None:
+        # The views must go before the block can be closed
+        del self.cells, self.left_ends, self.right_starts
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class _DiagonalSolver:
+    def __init__(self, parser: CYKParser):
+        self.parser = parser
+        self.dtype = _cell_dtype(len(parser.symbols))
+        self.left_mask = self.dtype.type(parser.left_mask)
+        self.right_mask = self.dtype.type(parser.right_mask)
+        self.table = self._full_table() if self.dtype.itemsize == 1 else None
+
+    def _full_table(self) -> np.ndarray:
+        # table[left, right] for every pair of 8-bit cells, one rule at a time
+        masks = np.arange(256, dtype=np.uint8)
+        table = np.zeros((256, 256), np.uint8)
+        for head, rules in enumerate(self.parser.rules):
+            for left, right in rules:
+                has_left = (masks >> left & 1).astype(bool)
+                has_right = (masks >> right & 1).astype(bool)
+                table[np.ix_(has_left, has_right)] |= np.uint8(1 << head)
+        return table
+
+    def _heads(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        if self.table is not None:
+            return self.table[left, right]
+        if self.dtype.itemsize <= 4:
+            keys = left.astype(np.uint64) << np.uint64(32) | right.astype(np.uint64)
+            unique, inverse = np.unique(keys, return_inverse=True)
+            lefts, rights = unique >> np.uint64(32), unique & np.uint64(0xFFFFFFFF)
+        else:
+            unique, inverse = np.unique(np.stack((left, right), axis=1), axis=0, return_inverse=True)
+            lefts, rights = unique[:, 0], unique[:, 1]
+        combine = self.parser.combine
+        heads = np.fromiter((combine(int(l), int(r)) for l, r in zip(lefts, rights)),
+                            self.dtype, len(lefts))
+        return heads[inverse.reshape(-1)]
+
+    def fill_tokens(self, chart: _Chart, tokens: Sequence[str]) -> bool:
+        # Length-1 diagonal; False when some token has no terminal production
+        n = len(tokens)
+        terminal_masks = self.parser.terminal_masks
+        masks = np.fromiter((terminal_masks.get(token, 0) for token in tokens), self.dtype, n)
+        if not masks.all():
+            return False
+        chart.cells[chart.offsets[:n]] = masks
+        self._mark(chart, np.arange(n, dtype=np.int64), 1, masks)
+        return True
+
+    def fill(self, chart: _Chart, length: int, start: int, stop: int) -> None:
+        # Cells (i, i + length) for start <= i < stop
+        step = max(1, BATCH_WORK // length)
+        for first in range(start, stop, step):
+            self._fill_batch(chart, length, first, min(first + step, stop))
+
+    def _fill_batch(self, chart: _Chart, length: int, start: int, stop: int) -> None:
+        i = np.arange(start, stop, dtype=np.int64)
+        j = i + length
+        # Bytes of the split bitsets covering k in (i, j): a window of `span` bytes from
+        # byte `low` of each row, copied out row by row; bytes past (j - 1) >> 3 are cleared
+        low = (i + 1) >> 3
+        span = (length + 14) >> 3
+        outside = low[:, None] + np.arange(span) > ((j - 1) >> 3)[:, None]
+        both = chart.windows(chart.left_ends, span)[i * chart.width + low]
+        both &= chart.windows(chart.right_starts, span)[j * chart.width + low]
+        both[outside] = 0
+        if not both.any():
+            return
+
+        rows, byte_columns = np.nonzero(both)
+        bits = np.unpackbits(both[rows, byte_columns][:, None], axis=1, bitorder="little")
+        hits, bit = np.nonzero(bits)
+        cell = rows[hits]
+        k = ((low[cell] + byte_columns[hits]) << 3) + bit
+        ci, cj = i[cell], j[cell]
+        offsets = chart.offsets
+        left = chart.cells[offsets[ci] + (k - ci - 1)]
+        right = chart.cells[offsets[k] + (cj - k - 1)]
+        heads = self._heads(left, right)
+
+        # Split points come out grouped by cell, so each cell is one reduceat segment
+        owners, segments = np.unique(cell, return_index=True)
+        masks = np.bitwise_or.reduceat(heads, segments)
+        filled = masks != 0
+        owners, masks = i[owners[filled]], masks[filled]
+        chart.cells[offsets[owners] + length - 1] = masks
+        self._mark(chart, owners, length, masks)
+
+    def _mark(self, chart: _Chart, i: np.ndarray, length: int, masks: np.ndarray) -> None:
+        j = i + length
+        lefts = (masks & self.left_mask) != 0
+        chart.left_ends[i[lefts], j[lefts] >> 3] |= (1 << (j[lefts] & 7)).astype(np.uint8)
+        rights = (masks & self.right_mask) != 0
+        chart.right_starts[j[rights], i[rights] >> 3] |= (1 << (i[rights] & 7)).astype(np.uint8)
+
+
+# Worker process state: the solver from the initializer, the chart of the current input
+# (guarded by _chart_lock against the release thread)
+_solver: Optional[_DiagonalSolver] = None
+_chart: Optional[_Chart] = None
+_chart_lock = threading.Lock()
+
+
+def _init_worker(grammar: Grammar, released, generation) -> None:
+    global _solver
+    _solver = _DiagonalSolver(CYKParser(grammar))
+    threading.Thread(target=_release_charts, args=(released, generation), daemon=True).start()
+
+
+def _release_charts(released, generation) -> None:
+    # The pool cannot send a task to every worker, so each worker waits for the caller to
+    # bump `generation` after an input and detaches from its (by then unlinked) chart
+    global _chart
+    seen = generation.value
+    while True:
+        with released:
+            released.wait_for(lambda: generation.value != seen)
+            seen = generation.value
+        with _chart_lock:
+            if _chart is not None:
+                _chart.close()
+                _chart = None
+
+
+def _fill_task(name: str, n: int, length: int, start: int, stop: int) -> None:
+    global _chart
+    with _chart_lock:
+        if _chart is None or _chart.name != name:
+            if _chart is not None:
+                _chart.close()
+            _chart = _Chart(n, _solver.dtype, name)
+        _solver.fill(_chart, length, start, stop)
+
+
+class ParallelCYKParser:
+    """
+    CYK recognizer that fills each chart diagonal across `workers` processes (default:
+    one per CPU; 1 runs in-process). Results match CYKParser.recognize; grammars with
+    more than MAX_SYMBOLS nonterminals fall back to it.
+    """
+
+    def __init__(self, grammar: Grammar, workers: Optional[int] = None, min_parallel_work: int = 1 << 20):
+        self.grammar = grammar
+        self.parser = CYKParser(grammar)
+        self.solver = _DiagonalSolver(self.parser) if len(self.parser.symbols) <= MAX_SYMBOLS else None
+        self.workers = workers or os.cpu_count() or 1
+        # Diagonals with fewer split points (cells x length) than this stay in-process
+        self.min_parallel_work = min_parallel_work
+        self._executor: Optional[Executor] = None
+        # Created with the pool; _generation is bumped under _released after every input
+        # the pool worked on
+        self._released = None
+        self._generation = None
+
+    def __enter__(self) -> "ParallelCYKParser":
+        # Start the pool up front rather than on the first long diagonal
+        self._pool()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _pool(self) -> Optional[Executor]:
+        if self.workers <= 1:
+            return None
+        if self._executor is None:
+            # Workers must share the caller's resource tracker, which sees the unlinks
+            resource_tracker.ensure_running()
+            self._released = multiprocessing.Condition()
+            self._generation = multiprocessing.Value('Q', 0, lock=False)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.grammar, self._released, self._generation))
+            # Start the workers now: forked after a chart exists, they would inherit its mapping
+            self._executor.submit(int).result()
+        return self._executor
+
+    def _fill(self, tokens: Sequence[str]) -> Optional[_Chart]:
+        n = len(tokens)
+        # The widest diagonal is the middle one; if it goes to the pool, start the pool first
+        half = (n + 1) // 2
+        if (n + 1 - half) * half >= self.min_parallel_work:
+            self._pool()
+        chart = _Chart(n, self.solver.dtype)
+        if not self.solver.fill_tokens(chart, tokens):
+            chart.close()
+            return None
+        dispatched = False
+        try:
+            for length in range(2, n + 1):
+                cells = n - length + 1
+                executor = self._pool() if cells * length >= self.min_parallel_work else None
+                if executor is None:
+                    self.solver.fill(chart, length, 0, cells)
+                    continue
+                dispatched = True
+                chunk = -(-cells // self.workers)
+                futures = [executor.submit(_fill_task, chart.name, n, length, start, min(start + chunk, cells))
+                           for start in range(0, cells, chunk)]
+                for future in futures:
+                    future.result()
+        except BaseException:
+            chart.close()
+            raise
+        finally:
+            if dispatched:
+                self._release_workers()
+        return chart
+
+    def _release_workers(self) -> None:
+        # Let every worker detach from the chart it holds
+        with self._released:
+            self._generation.value += 1
+            self._released.notify_all()
+
+    def chart(self, tokens: Sequence[str]) -> Optional[List[List[int]]]:
+        # Same layout as CYKParser.chart, for comparing the two on small inputs
+        if self.solver is None:
+            return self.parser.chart(tokens)
+        chart = self._fill(tokens)
+        if chart is None:
+            return None
+        n = len(tokens)
+        try:
+            return [chart.cells[chart.offsets[i]:chart.offsets[i] + n - i].tolist() for i in range(n)]
+        finally:
+            chart.close()
+
+    def recognize(self, tokens: Sequence[str]) -> bool:
+        if self.solver is None or not tokens:
+            return self.parser.recognize(tokens)
+        chart = self._fill(tokens)
+        if chart is None:
+            return False
+        try:
+            return bool(chart.cell(0, len(tokens)) & self.parser.start_bit)
+        finally:
+            chart.close()
+
+
+def parallel_cyk(grammar: Grammar, tokens: Sequence[str], workers: Optional[int] = None) -> bool:
+    with ParallelCYKParser(grammar, workers) as parser:
+        return parser.recognize(tokens)